@@ -1,32 +1,45 @@
-from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
-from database import SessionLocal, ApiCheck, init_db
-from sqlalchemy import func, case
-from datetime import datetime, timedelta
+import base64
+import json
+import os
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import HTMLResponse, StreamingResponse
+from sqlalchemy import case, func, select, tuple_
+from check_events import CHECK_EVENTS_BATCH, CheckEvents
+from database import ApiCheck, ApiSession, ErrorSignature, as_datetime, init_db
+from error_signatures import error_breakdown
+from http_cache import html_body
+from phase_timing import PHASES
+from response_cache import cached, response_cache
+from rollups import day_start, query_rollups
+from datetime import datetime, timedelta, timezone
 
 app = FastAPI(title="AI API Status Monitor")
 
+# Largest page /api/recent-checks returns; the stream variant has no limit.
+RECENT_CHECKS_MAX_LIMIT = int(os.getenv("RECENT_CHECKS_MAX_LIMIT", "1000"))
+# Rows per fetch from the server-side cursor of /api/recent-checks/{provider}/stream
+RECENT_CHECKS_STREAM_CHUNK = int(os.getenv("RECENT_CHECKS_STREAM_CHUNK", "1000"))
+
 # Initialize database on startup
 @app.on_event("startup")
 async def startup_event():
     init_db()
 @app.get("/api/debug")
-def debug_data():
+async def debug_data():
     """Debug - show what's actually in database"""
-    db = SessionLocal()
-    
-    # Get total count
-    total = db.query(ApiCheck).count()
-    
-    # Get all recent checks (last 100)
-    recent = db.query(ApiCheck).order_by(ApiCheck.timestamp.desc()).limit(100).all()
-    
-    # Get distinct providers
-    providers = db.query(ApiCheck.provider).distinct().all()
+    async with ApiSession() as db:
+        # Get total count
+        total = await db.scalar(select(func.count(ApiCheck.id)))
+
+        # Get all recent checks (last 100)
+        recent = (await db.scalars(select(ApiCheck).order_by(ApiCheck.timestamp.desc()).limit(100))).all()
+
+        # Get distinct providers
+        providers = (await db.scalars(select(ApiCheck.provider).distinct())).all()
     
     result = {
         'total_checks_in_database': total,
-        'distinct_providers': [p[0] for p in providers],
+        'distinct_providers': list(providers),
         'recent_10_checks': [
             {
                 'id': c.id,
@@ -43,107 +56,313 @@ def debug_data():
         'cutoff_24h_ago': (datetime.utcnow() - timedelta(hours=24)).isoformat()
     }
     
-    db.close()
     return result
+
+async def query_latest_check():
+    """(ID, timestamp) of the newest check"""
+    async with ApiSession() as db:
+        latest_id, latest_timestamp = (await db.execute(
+            select(func.max(ApiCheck.id), func.max(ApiCheck.timestamp))
+        )).one()
+    latest_timestamp = as_datetime(latest_timestamp)
+    return latest_id or 0, latest_timestamp.replace(tzinfo=timezone.utc) if latest_timestamp else None
+
+async def latest_check():
+    """Cached (ID, timestamp) of the newest check: the data version behind the ETags"""
+    return await response_cache.get_or_compute(('latest_check',), query_latest_check)
+
+def status_entry(stat):
+    """Dashboard status for one provider from its merged rollup stats"""
+    uptime = stat['uptime']
+    return {
+        'provider': stat['provider'],
+        'uptime': round(uptime, 1),
+        'avg_latency': round(stat['avg_latency'], 0) if stat['avg_latency'] else 0,
+        # Tail latency from merged hourly sketches (within 1%)
+        'p50_latency': round(stat['p50_latency'], 0) if stat['p50_latency'] is not None else None,
+        'p95_latency': round(stat['p95_latency'], 0) if stat['p95_latency'] is not None else None,
+        'p99_latency': round(stat['p99_latency'], 0) if stat['p99_latency'] is not None else None,
+        'checks': stat['total'],
+        'burst_checks': stat['burst_checks'],
+        'status': 'operational' if uptime >= 99 else 'degraded' if uptime >= 95 else 'major_outage',
+        'avg_ttft_ms': round(stat['avg_ttft'], 0) if stat['avg_ttft'] is not None else None,
+        'avg_inter_token_ms': round(stat['avg_inter_token'], 1) if stat['avg_inter_token'] is not None else None,
+        'avg_cold_latency': round(stat['avg_cold_latency'], 0) if stat['avg_cold_latency'] is not None else None,
+        'avg_warm_latency': round(stat['avg_warm_latency'], 0) if stat['avg_warm_latency'] is not None else None,
+        'avg_handshake_ms': round(stat['avg_handshake'], 1) if stat['avg_handshake'] is not None else None,
+        'avg_phases': {
+            phase: round(value, 1) if value is not None else None
+            for phase, value in stat['avg_phases'].items()
+        },
+        # Failed checks by failure_category (timeout, rate_limited, ...)
+        'failures': stat['failures']
+    }
+
+def history_entry(stat):
+    """One day of the uptime sparkline from a daily rollup bucket"""
+    return {
+        'date': stat['bucket_start'].date().isoformat(),
+        'uptime': round(stat['uptime'], 1)
+    }
+
+async def provider_entries(db, now, history_since):
+    """Dashboard entry per provider: status, uptime history and recent checks
+
+    Status covers the last 24 hours and the daily history starts at
+    history_since; one grouped query each.
+    """
+    cutoff = now - timedelta(hours=24)
+    stats = await db.run_sync(query_rollups, cutoff)
+    daily_stats = await db.run_sync(query_rollups, history_since, daily=True, by_bucket=True)
+    recent = (await db.execute(
+        select(
+            ApiCheck.provider,
+            func.count(ApiCheck.id),
+            func.coalesce(func.sum(case((ApiCheck.success == False, 1), else_=0)), 0),
+            func.max(ApiCheck.timestamp)
+        ).where(ApiCheck.timestamp >= cutoff).group_by(ApiCheck.provider)
+    )).all()
+
+    history = {}
+    for stat in daily_stats:
+        history.setdefault(stat['provider'], []).append(history_entry(stat))
+    recent_checks = {
+        provider: {
+            'checks': checks,
+            'failures': int(failures),
+            'last_check': as_datetime(last_check).isoformat()
+        }
+        for provider, checks, failures, last_check in recent
+    }
+
+    providers = []
+    for stat in stats:
+        entry = status_entry(stat)
+        entry['history'] = history.get(stat['provider'], [])
+        entry['recent'] = recent_checks.get(stat['provider'], {'checks': 0, 'failures': 0, 'last_check': None})
+        providers.append(entry)
+    return providers
+
+def check_entry(check, signature_message):
+    """One check as the dashboard lists it; signature_message is its error signature's text"""
+    return {
+        'id': check.id,
+        'timestamp': check.timestamp.isoformat(),
+        'success': check.success,
+        'latency_ms': round(check.latency_ms, 0) if check.success else None,
+        'error': (signature_message or check.error_message) if not check.success else None,
+        'error_signature_id': check.error_signature_id,
+        'failure_category': check.failure_category,
+        'http_status': check.http_status,
+        'retry_after_s': check.retry_after_s,
+        'failure_latency_ms': round(check.failure_latency_ms, 0) if check.failure_latency_ms is not None else None,
+        'probe_mode': check.probe_mode or 'completion',
+        'burst': bool(check.burst),
+        'connection_state': check.connection_state,
+        'ttft_ms': round(check.ttft_ms, 0) if check.ttft_ms is not None else None,
+        'inter_token_ms': round(check.inter_token_ms, 1) if check.inter_token_ms is not None else None,
+        'phases': {
+            phase: round(getattr(check, phase), 1) if getattr(check, phase) is not None else None
+            for phase in PHASES
+        }
+    }
+
 @app.get("/api/status")
-def get_status():
-    """Get current status (last 24 hours)"""
-    db = SessionLocal()
+@cached(validators=latest_check, windowed=True)
+async def get_status(rank_by: str = None):
+    """Get current status (last 24 hours)
+
+    rank_by=latency or rank_by=ttft orders providers fastest first.
+    """
     cutoff = datetime.utcnow() - timedelta(hours=24)
+
+    # Hourly rollups: the buckets that started in the last 24 hours.
+    # run_sync runs the shared sync query code on the session's connection.
+    async with ApiSession() as db:
+        stats = await db.run_sync(query_rollups, cutoff)
+
+    results = [status_entry(stat) for stat in stats]
+
+    rank_keys = {'latency': 'avg_latency', 'ttft': 'avg_ttft_ms'}
+    if rank_by in rank_keys:
+        key = rank_keys[rank_by]
+        # Providers without data for the metric sort last.
+        results.sort(key=lambda r: (not r[key], r[key] or 0))
     
-    stats = db.query(
-        ApiCheck.provider,
-        func.count(ApiCheck.id).label('total'),
-        func.sum(
-            case(
-                (ApiCheck.success == True, 1),
-                else_=0
-            )
-        ).label('successful'),
-        func.avg(ApiCheck.latency_ms).label('avg_latency')
-    ).filter(
-        ApiCheck.timestamp >= cutoff
-    ).group_by(ApiCheck.provider).all()
-    
-    results = []
-    for stat in stats:
-        uptime = (stat.successful / stat.total * 100) if stat.total > 0 else 0
-        results.append({
-            'provider': stat.provider,
-            'uptime': round(uptime, 1),
-            'avg_latency': round(stat.avg_latency, 0) if stat.avg_latency else 0,
-            'checks': stat.total,
-            'status': 'operational' if uptime >= 99 else 'degraded' if uptime >= 95 else 'major_outage'
-        })
-    
-    db.close()
     return results
 
-@app.get("/api/recent-checks/{provider}")
-def get_recent_checks(provider: str, hours: int = 24):
-    """Get recent checks for a provider (last 24 hours)"""
-    db = SessionLocal()
-    cutoff = datetime.utcnow() - timedelta(hours=hours)
-    
-    checks = db.query(ApiCheck).filter(
+@app.get("/api/dashboard")
+@cached(validators=latest_check, windowed=True)
+async def get_dashboard(days: int = 90):
+    """Everything the dashboard renders, for all providers, in one response
+
+    Status (last 24 hours), the daily uptime history and a summary of recent
+    checks, from one grouped query each instead of one request per provider.
+    """
+    now = datetime.utcnow()
+    async with ApiSession() as db:
+        providers = await provider_entries(db, now, day_start(now - timedelta(days=days)))
+    # Data time rather than generation time, so an unchanged dashboard keeps its ETag
+    last_check = max((p['recent']['last_check'] for p in providers if p['recent']['last_check']), default=None)
+    # The page resumes /api/events from here, so nothing written meanwhile is missed.
+    last_check_id, _ = await latest_check()
+    return {'last_check': last_check, 'last_check_id': last_check_id, 'history_days': days, 'providers': providers}
+
+def encode_cursor(timestamp, check_id):
+    """Opaque cursor for the checks after (timestamp, check_id) in newest-first order"""
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()}|{check_id}".encode()).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    try:
+        timestamp, check_id = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().split("|")
+        return datetime.fromisoformat(timestamp), int(check_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def recent_checks_query(provider, hours, failure=None, cursor=None):
+    """A provider's checks in the last `hours`, newest first, starting after cursor
+
+    Keyset order on (timestamp, id), served by ix_api_checks_provider_timestamp_id.
+    Plain rows rather than ORM objects: check_entry() only reads columns.
+    """
+    query = select(ApiCheck.__table__, ErrorSignature.message.label('signature_message')).outerjoin(
+        ErrorSignature, ErrorSignature.id == ApiCheck.error_signature_id
+    ).where(
         ApiCheck.provider == provider,
-        ApiCheck.timestamp >= cutoff
-    ).order_by(
-        ApiCheck.timestamp.desc()
-    ).limit(100).all()
-    
-    results = []
-    for check in checks:
-        results.append({
-            'timestamp': check.timestamp.isoformat(),
-            'success': check.success,
-            'latency_ms': round(check.latency_ms, 0) if check.success else None,
-            'error': check.error_message if not check.success else None
-        })
-    
-    db.close()
-    return results
+        ApiCheck.timestamp >= datetime.utcnow() - timedelta(hours=hours)
+    )
+    if failure is not None:
+        query = query.where(ApiCheck.failure_category == failure)
+    if cursor is not None:
+        query = query.where(tuple_(ApiCheck.timestamp, ApiCheck.id) < tuple_(*decode_cursor(cursor)))
+    return query.order_by(ApiCheck.timestamp.desc(), ApiCheck.id.desc())
+
+@app.get("/api/recent-checks/{provider}")
+@cached(validators=latest_check, windowed=True)
+async def get_recent_checks(provider: str, hours: int = 24, failure: str = None, limit: int = 100,
+                            cursor: str = None):
+    """Get recent checks for a provider (last 24 hours), newest first, a page at a time
+
+    failure=<category> (e.g. rate_limited, server_error) keeps only those failures.
+    Returns up to `limit` checks and a next_cursor; pass it back as cursor for
+    the next page until it is null.
+    """
+    limit = max(1, min(limit, RECENT_CHECKS_MAX_LIMIT))
+    # One extra row tells whether there is a next page.
+    async with ApiSession() as db:
+        rows = (await db.execute(recent_checks_query(provider, hours, failure, cursor).limit(limit + 1))).all()
+
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1].timestamp, page[-1].id) if len(rows) > limit else None
+    return {
+        'checks': [check_entry(row, row.signature_message) for row in page],
+        'next_cursor': next_cursor
+    }
+
+@app.get("/api/recent-checks/{provider}/stream")
+async def stream_recent_checks(provider: str, hours: int = 24, failure: str = None, cursor: str = None):
+    """Every check in the window as NDJSON, newest first, in constant memory
+
+    Rows come off a server-side cursor RECENT_CHECKS_STREAM_CHUNK at a time
+    and are written out before the next fetch, so a week of checks is never
+    held at once. Not cached.
+    """
+    query = recent_checks_query(provider, hours, failure, cursor).execution_options(
+        yield_per=RECENT_CHECKS_STREAM_CHUNK
+    )
+
+    async def lines():
+        async with ApiSession() as db:
+            result = await db.stream(query)
+            async for rows in result.partitions():
+                yield "".join(
+                    json.dumps(check_entry(row, row.signature_message), separators=(',', ':')) + "\n"
+                    for row in rows
+                )
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.get("/api/errors")
+@cached(validators=latest_check, windowed=True)
+async def get_errors(hours: int = 24, provider: str = None):
+    """Failures grouped by error signature (last 24 hours)"""
+    async with ApiSession() as db:
+        return await db.run_sync(error_breakdown, datetime.utcnow() - timedelta(hours=hours), provider=provider)
 
 @app.get("/api/uptime-history/{provider}")
-def get_uptime_history(provider: str, days: int = 90):
+@cached(validators=latest_check, windowed=True)
+async def get_uptime_history(provider: str, days: int = 90):
     """Get daily uptime history for sparkline"""
-    db = SessionLocal()
     cutoff = datetime.utcnow() - timedelta(days=days)
-    
-    daily_stats = db.query(
-        func.date(ApiCheck.timestamp).label('date'),
-        func.count(ApiCheck.id).label('total'),
-        func.sum(
-            case(
-                (ApiCheck.success == True, 1),
-                else_=0
-            )
-        ).label('successful')
-    ).filter(
-        ApiCheck.provider == provider,
-        ApiCheck.timestamp >= cutoff
-    ).group_by(
-        func.date(ApiCheck.timestamp)
-    ).order_by(
-        func.date(ApiCheck.timestamp)
-    ).all()
-    
-    history = []
-    for stat in daily_stats:
-        uptime = (stat.successful / stat.total * 100) if stat.total > 0 else 0
-        history.append({
-            'date': stat.date.isoformat() if hasattr(stat.date, 'isoformat') else str(stat.date),
-            'uptime': round(uptime, 1)
-        })
-    
-    db.close()
-    return history
 
-@app.get("/", response_class=HTMLResponse)
-def dashboard():
-    """GitHub-inspired status dashboard with expandable details"""
-    # [Keep your existing HTML here - no changes needed]
-    return """
+    # One daily rollup row per model and day instead of every raw check.
+    async with ApiSession() as db:
+        daily_stats = await db.run_sync(
+            query_rollups, day_start(cutoff), daily=True, provider=provider, by_bucket=True
+        )
+
+    return [history_entry(stat) for stat in daily_stats]
+
+@app.get("/api/cache-stats")
+async def get_cache_stats():
+    """Hit/miss counters of the response cache (see response_cache.py)"""
+    return {**response_cache.stats(), 'events': check_events.stats()}
+
+async def check_events_since(after_id):
+    """Events for the checks with an ID above after_id, then each affected provider's status
+
+    A 'status' event carries the provider's dashboard entry with today's
+    history bar instead of the whole history.
+    """
+    query = select(ApiCheck, ErrorSignature.message).outerjoin(
+        ErrorSignature, ErrorSignature.id == ApiCheck.error_signature_id
+    ).where(ApiCheck.id > after_id).order_by(ApiCheck.id).limit(CHECK_EVENTS_BATCH)
+    async with ApiSession() as db:
+        checks = (await db.execute(query)).all()
+        if not checks:
+            return [], after_id
+        now = datetime.utcnow()
+        providers = await provider_entries(db, now, day_start(now))
+
+    last_id = checks[-1][0].id
+    events = [
+        ('check', check.id, {'provider': check.provider, 'model': check.model,
+                             **check_entry(check, signature_message)})
+        for check, signature_message in checks
+    ]
+    changed = {check.provider for check, _ in checks}
+    for entry in providers:
+        if entry['provider'] in changed:
+            history = entry.pop('history')
+            entry['today'] = history[-1] if history else None
+            events.append(('status', last_id, entry))
+    return events, last_id
+
+async def latest_check_id():
+    latest_id, _ = await query_latest_check()
+    return latest_id
+
+check_events = CheckEvents(check_events_since, latest_check_id)
+
+@app.get("/api/events")
+async def stream_events(request: Request, after: int = None):
+    """Server-Sent Events: each new check and its provider's status, as they are written
+
+    A reconnecting browser (Last-Event-ID) or ?after=<check id> first gets
+    the checks it missed.
+    """
+    last_event_id = request.headers.get("last-event-id", "")
+    if last_event_id.isdigit():
+        after = int(last_event_id)
+    return StreamingResponse(
+        check_events.stream(after),
+        media_type="text/event-stream",
+        # No caching, and no buffering in nginx-style proxies
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# GitHub-inspired status dashboard with expandable details
+DASHBOARD_HTML = """
     <!DOCTYPE html>
     <html>
     <head>
@@ -482,84 +701,105 @@ def dashboard():
         
         <script>
             let expandedProvider = null;
+            let dashboard = null;
+            // Loaded check tables per provider, newest first; live checks are added on top.
+            const recentChecks = {};
+            let renderPending = false;
             
             async function loadStatus() {
                 try {
-                    const response = await fetch('/api/status');
-                    const providers = await response.json();
-                    
-                    const grid = document.getElementById('status-grid');
-                    
-                    if (providers.length === 0) {
-                        grid.innerHTML = '<div class="loading">No data yet. Checks running every hour.</div>';
-                        return;
-                    }
+                    // One request for every provider's status, history and recent checks.
+                    const response = await fetch('/api/dashboard', {cache: 'no-cache'});
+                    dashboard = await response.json();
+                    await renderStatus();
+                } catch (error) {
+                    console.error('Error loading status:', error);
+                    document.getElementById('status-grid').innerHTML = 
+                        '<div class="loading">Error loading data</div>';
+                }
+            }
+            
+            async function renderStatus() {
+                const providers = dashboard.providers;
+                
+                const grid = document.getElementById('status-grid');
+                
+                if (providers.length === 0) {
+                    grid.innerHTML = '<div class="loading">No data yet. Checks running every hour.</div>';
+                    return;
+                }
+                
+                document.getElementById('last-updated').textContent = 
+                    `Last updated: ${new Date().toLocaleTimeString()}`;
+                
+                let html = '';
+                
+                for (const provider of providers) {
+                    const uptimeBars = generateUptimeBars(provider.history);
+                    const statusClass = provider.status;
+                    const statusText = provider.status === 'operational' ? 'Operational' :
+                                     provider.status === 'degraded' ? 'Degraded Performance' :
+                                     'Major Outage';
                     
-                    document.getElementById('last-updated').textContent = 
-                        `Last updated: ${new Date().toLocaleTimeString()}`;
+                    const checkmark = provider.status === 'operational' ? 
+                        '<svg viewBox="0 0 16 16"><path d="M13.78 4.22a.75.75 0 010 1.06l-7.25 7.25a.75.75 0 01-1.06 0L2.22 9.28a.75.75 0 011.06-1.06L6 10.94l6.72-6.72a.75.75 0 011.06 0z"></path></svg>' : '';
                     
-                    let html = '';
+                    const isExpanded = expandedProvider === provider.provider;
                     
-                    for (const provider of providers) {
-                        const uptimeBars = await generateUptimeBars(provider.provider);
-                        const statusClass = provider.status;
-                        const statusText = provider.status === 'operational' ? 'Operational' :
-                                         provider.status === 'degraded' ? 'Degraded Performance' :
-                                         'Major Outage';
-                        
-                        const checkmark = provider.status === 'operational' ? 
-                            '<svg viewBox="0 0 16 16"><path d="M13.78 4.22a.75.75 0 010 1.06l-7.25 7.25a.75.75 0 01-1.06 0L2.22 9.28a.75.75 0 011.06-1.06L6 10.94l6.72-6.72a.75.75 0 011.06 0z"></path></svg>' : '';
-                        
-                        const isExpanded = expandedProvider === provider.provider;
-                        
-                        html += `
-                            <div class="component ${isExpanded ? 'expanded' : ''}" data-provider="${provider.provider}">
-                                <div class="component-header" onclick="toggleDetails('${provider.provider}')">
-                                    <div class="component-name">
-                                        <span class="expand-icon">▶</span>
-                                        <div class="status-indicator ${statusClass}">
-                                            ${checkmark}
-                                        </div>
-                                        <span>${capitalizeProvider(provider.provider)}</span>
+                    html += `
+                        <div class="component ${isExpanded ? 'expanded' : ''}" data-provider="${provider.provider}">
+                            <div class="component-header" onclick="toggleDetails('${provider.provider}')">
+                                <div class="component-name">
+                                    <span class="expand-icon">▶</span>
+                                    <div class="status-indicator ${statusClass}">
+                                        ${checkmark}
                                     </div>
-                                    
-                                    <div>
-                                        <div class="uptime-bar">
-                                            <div class="uptime-graph">
-                                                ${uptimeBars}
-                                            </div>
-                                        </div>
-                                        <div class="timeline-labels">
-                                            <span>90 days ago</span>
-                                            <span>Today</span>
-                                        </div>
-                                        <div class="metrics">
-                                            <span class="metric-item">⚡ ${provider.avg_latency}ms avg</span>
-                                            <span class="metric-item">📊 ${provider.uptime}% uptime</span>
-                                            <span class="metric-item">✓ ${provider.checks} checks</span>
+                                    <span>${capitalizeProvider(provider.provider)}</span>
+                                </div>
+                                
+                                <div>
+                                    <div class="uptime-bar">
+                                        <div class="uptime-graph">
+                                            ${uptimeBars}
                                         </div>
                                     </div>
-                                    
-                                    <div class="status-text ${statusClass}">
-                                        ${statusText}
+                                    <div class="timeline-labels">
+                                        <span>90 days ago</span>
+                                        <span>Today</span>
+                                    </div>
+                                    <div class="metrics">
+                                        <span class="metric-item">⚡ ${provider.avg_latency}ms avg</span>
+                                        ${provider.avg_ttft_ms !== null ? `<span class="metric-item">⏱ ${provider.avg_ttft_ms}ms first token</span>` : ''}
+                                        <span class="metric-item">📊 ${provider.uptime}% uptime</span>
+                                        <span class="metric-item">✓ ${provider.checks} checks</span>
+                                        ${provider.recent.failures ? `<span class="metric-item">✗ ${provider.recent.failures} failed (24h)</span>` : ''}
                                     </div>
                                 </div>
                                 
-                                <div class="component-details">
-                                    <div class="details-content" id="details-${provider.provider}">
-                                        ${isExpanded ? await loadRecentChecks(provider.provider) : ''}
-                                    </div>
+                                <div class="status-text ${statusClass}">
+                                    ${statusText}
                                 </div>
                             </div>
-                        `;
+                            
+                            <div class="component-details">
+                                <div class="details-content" id="details-${provider.provider}">
+                                    ${isExpanded ? '<div class="details-loading">Loading recent checks...</div>' : ''}
+                                </div>
+                            </div>
+                        </div>
+                    `;
+                }
+                
+                grid.innerHTML = html;
+                
+                // Only the open provider's check list needs its own request.
+                if (expandedProvider) {
+                    const detailsDiv = document.getElementById(`details-${expandedProvider}`);
+                    if (detailsDiv) {
+                        detailsDiv.innerHTML = recentChecks[expandedProvider] ?
+                            renderRecentChecks(recentChecks[expandedProvider]) :
+                            await loadRecentChecks(expandedProvider);
                     }
-                    
-                    grid.innerHTML = html;
-                    
-                } catch (error) {
-                    console.error('Error loading status:', error);
-                    document.getElementById('status-grid').innerHTML = 
-                        '<div class="loading">Error loading data</div>';
                 }
             }
             
@@ -592,117 +832,166 @@ def dashboard():
             
             async function loadRecentChecks(provider) {
                 try {
-                    const response = await fetch(`/api/recent-checks/${provider}?hours=24`);
-                    const checks = await response.json();
-                    
-                    if (checks.length === 0) {
-                        return '<div class="details-loading">No checks in the last 24 hours</div>';
-                    }
+                    const response = await fetch(`/api/recent-checks/${provider}?hours=24`, {cache: 'no-cache'});
+                    recentChecks[provider] = (await response.json()).checks;
+                    return renderRecentChecks(recentChecks[provider]);
+                } catch (error) {
+                    console.error('Error loading recent checks:', error);
+                    return '<div class="details-loading">Error loading checks</div>';
+                }
+            }
+            
+            function renderRecentChecks(checks) {
+                if (checks.length === 0) {
+                    return '<div class="details-loading">No checks in the last 24 hours</div>';
+                }
+                
+                let html = `
+                    <div class="details-header">
+                        <span>Recent Checks (Last 24 Hours)</span>
+                        <span style="font-weight: normal; color: #57606a;">${checks.length} total checks</span>
+                    </div>
+                    <table class="checks-table">
+                        <thead>
+                            <tr>
+                                <th>Time</th>
+                                <th>Status</th>
+                                <th>Latency</th>
+                                <th>Details</th>
+                            </tr>
+                        </thead>
+                        <tbody>
+                `;
+                
+                for (const check of checks) {
+                    const time = new Date(check.timestamp);
+                    const timeStr = time.toLocaleTimeString() + ' ' + time.toLocaleDateString();
                     
-                    let html = `
-                        <div class="details-header">
-                            <span>Recent Checks (Last 24 Hours)</span>
-                            <span style="font-weight: normal; color: #57606a;">${checks.length} total checks</span>
-                        </div>
-                        <table class="checks-table">
-                            <thead>
-                                <tr>
-                                    <th>Time</th>
-                                    <th>Status</th>
-                                    <th>Latency</th>
-                                    <th>Details</th>
-                                </tr>
-                            </thead>
-                            <tbody>
-                    `;
+                    const statusHtml = check.success ? 
+                        '<span class="check-status"><span class="check-dot success"></span>Success</span>' :
+                        '<span class="check-status"><span class="check-dot failure"></span>Failed</span>';
                     
-                    for (const check of checks) {
-                        const time = new Date(check.timestamp);
-                        const timeStr = time.toLocaleTimeString() + ' ' + time.toLocaleDateString();
-                        
-                        const statusHtml = check.success ? 
-                            '<span class="check-status"><span class="check-dot success"></span>Success</span>' :
-                            '<span class="check-status"><span class="check-dot failure"></span>Failed</span>';
-                        
-                        let latencyClass = '';
-                        let latencyStr = '';
-                        if (check.success) {
-                            if (check.latency_ms < 1000) {
-                                latencyClass = 'latency-good';
-                            } else if (check.latency_ms < 2000) {
-                                latencyClass = 'latency-ok';
-                            } else {
-                                latencyClass = 'latency-bad';
-                            }
-                            latencyStr = `<span class="${latencyClass}">${check.latency_ms}ms</span>`;
+                    let latencyClass = '';
+                    let latencyStr = '';
+                    if (check.success) {
+                        if (check.latency_ms < 1000) {
+                            latencyClass = 'latency-good';
+                        } else if (check.latency_ms < 2000) {
+                            latencyClass = 'latency-ok';
                         } else {
-                            latencyStr = '<span style="color: #57606a;">-</span>';
+                            latencyClass = 'latency-bad';
                         }
-                        
-                        const details = check.error ? 
-                            `<span class="error-message">${check.error.substring(0, 100)}${check.error.length > 100 ? '...' : ''}</span>` :
-                            '<span style="color: #1a7f37;">✓ Operational</span>';
-                        
-                        html += `
-                            <tr>
-                                <td>${timeStr}</td>
-                                <td>${statusHtml}</td>
-                                <td>${latencyStr}</td>
-                                <td>${details}</td>
-                            </tr>
-                        `;
+                        latencyStr = `<span class="${latencyClass}">${check.latency_ms}ms</span>`;
+                    } else {
+                        latencyStr = '<span style="color: #57606a;">-</span>';
                     }
                     
+                    const details = check.error ? 
+                        `<span class="error-message">${check.error.substring(0, 100)}${check.error.length > 100 ? '...' : ''}</span>` :
+                        '<span style="color: #1a7f37;">✓ Operational</span>';
+                    
                     html += `
-                            </tbody>
-                        </table>
+                        <tr>
+                            <td>${timeStr}</td>
+                            <td>${statusHtml}</td>
+                            <td>${latencyStr}</td>
+                            <td>${details}</td>
+                        </tr>
                     `;
-                    
-                    return html;
-                    
-                } catch (error) {
-                    console.error('Error loading recent checks:', error);
-                    return '<div class="details-loading">Error loading checks</div>';
                 }
+                
+                html += `
+                        </tbody>
+                    </table>
+                `;
+                
+                return html;
             }
             
-            async function generateUptimeBars(provider) {
-                try {
-                    const response = await fetch(`/api/uptime-history/${provider}?days=90`);
-                    const history = await response.json();
-                    
-                    if (history.length === 0) {
-                        let bars = '';
-                        for (let i = 0; i < 90; i++) {
-                            bars += '<div class="uptime-day no-data" style="height: 100%"></div>';
-                        }
-                        return bars;
+            // Live updates: /api/events pushes each new check and its provider's status.
+            function applyCheck(check) {
+                const checks = recentChecks[check.provider];
+                // A check replayed after a reconnect may be in the table already.
+                if (checks && !checks.some(c => c.id === check.id)) {
+                    checks.unshift(check);
+                    checks.splice(100);
+                }
+            }
+            
+            function applyStatus(status) {
+                const {today, ...entry} = status;
+                let provider = dashboard.providers.find(p => p.provider === status.provider);
+                if (provider) {
+                    Object.assign(provider, entry);
+                } else {
+                    provider = {...entry, history: []};
+                    dashboard.providers.push(provider);
+                }
+                if (today) {
+                    const history = provider.history;
+                    if (history.length && history[history.length - 1].date === today.date) {
+                        history[history.length - 1] = today;
+                    } else {
+                        history.push(today);
+                        history.splice(0, history.length - dashboard.history_days);
                     }
-                    
-                    let bars = '';
-                    for (const day of history) {
-                        const statusClass = day.uptime >= 99 ? 'operational' :
-                                          day.uptime >= 95 ? 'degraded' :
-                                          day.uptime >= 50 ? 'major_outage' : 'major_outage';
-                        
-                        bars += `<div class="uptime-day ${statusClass}" 
-                                     style="height: ${day.uptime}%" 
-                                     title="${day.date}: ${day.uptime}% uptime"></div>`;
+                }
+            }
+            
+            function scheduleRender() {
+                // A write arrives as a burst of events; render once for all of them.
+                if (renderPending) return;
+                renderPending = true;
+                setTimeout(async () => {
+                    renderPending = false;
+                    try {
+                        await renderStatus();
+                    } catch (error) {
+                        console.error('Error rendering status:', error);
                     }
-                    
-                    for (let i = history.length; i < 90; i++) {
-                        bars += '<div class="uptime-day no-data" style="height: 100%"></div>';
+                }, 100);
+            }
+            
+            function connectEvents() {
+                // Resume after the newest check the dashboard already includes;
+                // reconnects resume from the last event by themselves.
+                const events = new EventSource(`/api/events?after=${dashboard.last_check_id}`);
+                events.addEventListener('check', e => { applyCheck(JSON.parse(e.data)); scheduleRender(); });
+                events.addEventListener('status', e => { applyStatus(JSON.parse(e.data)); scheduleRender(); });
+                events.onerror = () => {
+                    // Closed for good (not just reconnecting): start over in a minute.
+                    if (events.readyState === EventSource.CLOSED) {
+                        setTimeout(startLive, 60000);
                     }
+                };
+            }
+            
+            async function startLive() {
+                await loadStatus();
+                if (dashboard) {
+                    connectEvents();
+                } else {
+                    setTimeout(startLive, 60000);
+                }
+            }
+            
+            function generateUptimeBars(history) {
+                let bars = '';
+                for (const day of history) {
+                    const statusClass = day.uptime >= 99 ? 'operational' :
+                                      day.uptime >= 95 ? 'degraded' :
+                                      day.uptime >= 50 ? 'major_outage' : 'major_outage';
                     
-                    return bars;
-                    
-                } catch (error) {
-                    let bars = '';
-                    for (let i = 0; i < 90; i++) {
-                        bars += '<div class="uptime-day no-data" style="height: 100%"></div>';
-                    }
-                    return bars;
+                    bars += `<div class="uptime-day ${statusClass}" 
+                                 style="height: ${day.uptime}%" 
+                                 title="${day.date}: ${day.uptime}% uptime"></div>`;
+                }
+                
+                for (let i = history.length; i < 90; i++) {
+                    bars += '<div class="uptime-day no-data" style="height: 100%"></div>';
                 }
+                
+                return bars;
             }
             
             function capitalizeProvider(name) {
@@ -714,8 +1003,12 @@ def dashboard():
                 return names[name] || name.charAt(0).toUpperCase() + name.slice(1);
             }
             
-            loadStatus();
-            setInterval(loadStatus, 60000);
+            if (window.EventSource) {
+                startLive();
+            } else {
+                loadStatus();
+                setInterval(loadStatus, 60000);
+            }
         </script>
         <div style="max-width: 800px; margin: 40px auto; padding: 20px; background: white; border-radius: 6px;">
             <h3>What is this?</h3>
@@ -730,6 +1023,14 @@ def dashboard():
     </html>
     """
 
+# Compressed once here instead of on every hit.
+DASHBOARD = html_body(DASHBOARD_HTML)
+
+@app.get("/", response_class=HTMLResponse)
+async def dashboard(request: Request):
+    """The dashboard page, precompressed, with an ETag for conditional GETs"""
+    return DASHBOARD.respond(request)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
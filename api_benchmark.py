@@ -0,0 +1,198 @@
+# api_benchmark.py
+"""Load benchmark for the read endpoints in api.py.
+
+Starts the API with uvicorn against a seeded benchmark database, then keeps
+BENCH_API_CLIENTS concurrent clients requesting each endpoint for
+BENCH_API_DURATION_S seconds. Reports requests/sec and p50/p95/p99 latency
+per endpoint, and writes JSON so runs from different commits can be
+compared. With BENCH_BASELINE=<earlier json> it also prints the change.
+"""
+import asyncio
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from probe_benchmark import git_commit, wait_for_port
+
+BENCH_API_CLIENTS = int(os.getenv("BENCH_API_CLIENTS", "500"))
+BENCH_API_DURATION_S = float(os.getenv("BENCH_API_DURATION_S", "15"))
+BENCH_API_PORT = int(os.getenv("BENCH_API_PORT", "8910"))
+BENCH_API_ENDPOINTS = [
+    e.strip() for e in os.getenv(
+        "BENCH_API_ENDPOINTS", "/api/status,/api/uptime-history/openai?days=90,/api/recent-checks/openai?hours=24"
+    ).split(",") if e.strip()
+]
+# Days of synthetic hourly checks seeded per provider.
+BENCH_HISTORY_DAYS = int(os.getenv("BENCH_HISTORY_DAYS", "14"))
+# Never the monitoring database: benchmark rows would show up as real checks.
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL", "sqlite:///./api_benchmark.db")
+BENCH_OUTPUT = os.getenv("BENCH_OUTPUT")
+BENCH_BASELINE = os.getenv("BENCH_BASELINE")
+
+PROVIDERS = ("openai", "anthropic", "google")
+
+
+def percentiles(values):
+    if not values:
+        return {"p50": None, "p95": None, "p99": None}
+    ordered = sorted(values)
+
+    def at(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+    return {"p50": at(0.50), "p95": at(0.95), "p99": at(0.99)}
+
+
+def seed():
+    """Fill the benchmark database with hourly checks for every provider"""
+    from database import init_db
+    from result_sink import CheckSink
+
+    init_db()
+    sink = CheckSink(flush_size=5000)
+    now = datetime.utcnow()
+    for hour in range(BENCH_HISTORY_DAYS * 24):
+        for i, provider in enumerate(PROVIDERS):
+            failed = (hour + i) % 37 == 0
+            sink.add(
+                provider=provider,
+                model=f"mock-{provider}",
+                timestamp=now - timedelta(hours=hour),
+                latency_ms=None if failed else 400 + (hour * 7 + i * 50) % 900,
+                success=not failed,
+                error_message="RateLimitError: Error code: 429" if failed else None,
+                failure_category="rate_limited" if failed else None,
+                interval_s=3600.0,
+            )
+    sink.close()
+
+
+async def load(base_url, path, clients, duration_s):
+    """`clients` concurrent request loops on one endpoint for duration_s"""
+    import httpx
+
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration_s
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    response.raise_for_status()
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        wall_s = time.perf_counter() - start
+
+    return {
+        "endpoint": path,
+        "requests": len(latencies),
+        "errors": errors,
+        "wall_s": round(wall_s, 3),
+        "requests_per_s": round(len(latencies) / wall_s, 1),
+        "latency_ms": percentiles(latencies),
+    }
+
+
+def print_comparison(runs, baseline_path):
+    baseline = {run["endpoint"]: run for run in json.loads(Path(baseline_path).read_text())["runs"]}
+    print()
+    print(f"Change vs {baseline_path}:")
+    for run in runs:
+        before = baseline.get(run["endpoint"])
+        if not before or not before["requests_per_s"]:
+            continue
+        rps = (run["requests_per_s"] / before["requests_per_s"] - 1) * 100
+        p99_before, p99_after = before["latency_ms"]["p99"], run["latency_ms"]["p99"]
+        print(f"  {run['endpoint']:45s} req/s {before['requests_per_s']:8.1f} -> {run['requests_per_s']:8.1f} "
+              f"({rps:+.0f}%)   p99 {p99_before or 0:8.1f}ms -> {p99_after or 0:8.1f}ms")
+
+
+def main():
+    here = Path(__file__).resolve().parent
+    # The seeding CheckSink spools here rather than in the real check spool.
+    scratch = Path(tempfile.mkdtemp(prefix="api_benchmark-"))
+    env = {**os.environ, "MONITOR_TYPE": "main", "DATABASE_URL": BENCH_DATABASE_URL, "NO_PROXY": "127.0.0.1",
+           "CHECK_SPOOL_PATH": str(scratch / "check_spool.db")}
+
+    if BENCH_DATABASE_URL.startswith("sqlite:///"):
+        Path(BENCH_DATABASE_URL[len("sqlite:///"):]).unlink(missing_ok=True)
+
+    print("\n" + "="*84)
+    print("AI API MONITOR - API Load Benchmark")
+    print("="*84)
+    print(f"Clients: {BENCH_API_CLIENTS}  Duration: {BENCH_API_DURATION_S:g}s per endpoint  "
+          f"History: {BENCH_HISTORY_DAYS} days")
+    print()
+
+    try:
+        subprocess.run([sys.executable, str(here / "api_benchmark.py"), "--seed"], env=env, check=True,
+                       stdout=subprocess.DEVNULL)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api:app", "--port", str(BENCH_API_PORT), "--log-level", "warning"],
+        cwd=here, env=env, stdout=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{BENCH_API_PORT}"
+    print(f"{'Endpoint':45s} {'Req/s':>8s} {'Errors':>7s} {'p50':>9s} {'p95':>9s} {'p99':>9s}")
+    print("-"*84)
+    runs = []
+    try:
+        wait_for_port(BENCH_API_PORT, timeout_s=30)
+        for path in BENCH_API_ENDPOINTS:
+            run = asyncio.run(load(base_url, path, BENCH_API_CLIENTS, BENCH_API_DURATION_S))
+            runs.append(run)
+            latency = run["latency_ms"]
+            print(f"{path:45s} {run['requests_per_s']:8.1f} {run['errors']:7d} {latency['p50'] or 0:7.1f}ms "
+                  f"{latency['p95'] or 0:7.1f}ms {latency['p99'] or 0:7.1f}ms")
+    finally:
+        server.terminate()
+        server.wait()
+
+    commit = git_commit()
+    report = {
+        "benchmark": "api",
+        "commit": commit,
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "database": BENCH_DATABASE_URL.split("://", 1)[0],
+        "config": {
+            "clients": BENCH_API_CLIENTS,
+            "duration_s": BENCH_API_DURATION_S,
+            "history_days": BENCH_HISTORY_DAYS,
+            "async_db": os.getenv("API_ASYNC_DB", "0") == "1",
+        },
+        "runs": runs,
+    }
+    output = Path(BENCH_OUTPUT or here / "reports" / "benchmarks" / f"api-{commit}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    if BENCH_BASELINE:
+        print_comparison(runs, BENCH_BASELINE)
+    print()
+    print(f"📄 Results written to {output}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--seed"]:
+        seed()
+    else:
+        main()
@@ -0,0 +1,266 @@
+# check_archive.py
+"""Columnar archive of raw api_checks in date-partitioned Parquet files.
+
+    archive/checks/date=2026-10-15/checks.parquet
+
+`python check_archive.py` exports every complete day whose file doesn't
+already hold all of that day's checks, then compacts the day into one file
+(deduplicated by id, sorted by timestamp). `--prune DAYS` also deletes
+archived checks older than DAYS from the database, once the archive and the
+rollups both account for every row. provider, model, error_message and the
+other low-cardinality strings are dictionary-encoded.
+
+load_checks() reads the files memory-mapped and returns NumPy arrays, so
+analysis never goes through the database.
+"""
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import Boolean, DateTime, Float, Integer, delete, func, select
+
+from database import SessionLocal, ApiCheck, as_datetime, engine, init_db
+from rollups import day_start
+
+CHECK_ARCHIVE_DIR = os.getenv("CHECK_ARCHIVE_DIR", "archive/checks")
+# Rows fetched from the database per Arrow record batch.
+CHECK_EXPORT_BATCH = int(os.getenv("CHECK_EXPORT_BATCH", "10000"))
+
+DICTIONARY_COLUMNS = ["provider", "model", "error_message", "connection_state", "probe_mode"]
+COMPACTED_FILE = "checks.parquet"
+
+ARROW_TYPES = {Integer: pa.int64(), Float: pa.float64(), Boolean: pa.bool_(), DateTime: pa.timestamp("us")}
+
+
+def arrow_schema(table=ApiCheck.__table__):
+    """Arrow schema for the columns of `table`; anything else is a string"""
+    fields = []
+    for column in table.columns:
+        arrow_type = next((t for sql, t in ARROW_TYPES.items() if isinstance(column.type, sql)), pa.string())
+        fields.append(pa.field(column.name, arrow_type))
+    return pa.schema(fields)
+
+
+SCHEMA = arrow_schema()
+
+
+def day_dir(day, root=CHECK_ARCHIVE_DIR):
+    return os.path.join(root, f"date={day:%Y-%m-%d}")
+
+
+def _conform(table):
+    """Cast `table` to SCHEMA, adding columns older files don't have as nulls"""
+    columns = [
+        table.column(field.name).cast(field.type) if field.name in table.column_names
+        else pa.nulls(table.num_rows, field.type)
+        for field in SCHEMA
+    ]
+    return pa.Table.from_arrays(columns, schema=SCHEMA)
+
+
+def _write(table, path):
+    pq.write_table(table, path, use_dictionary=DICTIONARY_COLUMNS, compression="zstd")
+
+
+def is_archive_file(name):
+    """Whether a file in a day directory holds archived checks: a part file or the compacted file"""
+    return name == COMPACTED_FILE or (name.startswith("part-") and name.endswith(".parquet"))
+
+
+def day_files(path):
+    """The archive files in a day directory, in name order"""
+    return sorted(name for name in os.listdir(path) if is_archive_file(name))
+
+
+def remove_staging(path):
+    """Delete the .tmp files a crashed export or compaction left in a day directory"""
+    for name in os.listdir(path):
+        if name.endswith(".tmp"):
+            os.remove(os.path.join(path, name))
+
+
+def archived_rows(day, root=CHECK_ARCHIVE_DIR):
+    """Rows stored for `day`, from the Parquet footers only"""
+    path = day_dir(day, root)
+    if not os.path.isdir(path):
+        return 0
+    return sum(pq.ParquetFile(os.path.join(path, name)).metadata.num_rows for name in day_files(path))
+
+
+def export_day(day, root=CHECK_ARCHIVE_DIR):
+    """Write the checks of one UTC day as a new part file; returns rows written"""
+    end = day + timedelta(days=1)
+    query = (
+        select(ApiCheck.__table__)
+        .where(ApiCheck.timestamp >= day, ApiCheck.timestamp < end)
+        .order_by(ApiCheck.timestamp)
+    )
+    path = day_dir(day, root)
+    os.makedirs(path, exist_ok=True)
+    part = os.path.join(path, f"part-{uuid.uuid4().hex}.parquet")
+    # Written under a .tmp name and renamed when complete, so a crash never leaves a truncated part.
+    staging = os.path.join(path, f".{os.path.basename(part)}.tmp")
+    written = 0
+    # Core rows in batches straight into Arrow; no ORM objects.
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=CHECK_EXPORT_BATCH).execute(query)
+        with pq.ParquetWriter(staging, SCHEMA, use_dictionary=DICTIONARY_COLUMNS, compression="zstd") as writer:
+            for rows in result.partitions():
+                batch = pa.RecordBatch.from_pylist([row._asdict() for row in rows], schema=SCHEMA)
+                writer.write_batch(batch)
+                written += batch.num_rows
+    if written:
+        os.replace(staging, part)
+    else:
+        os.remove(staging)
+    return written
+
+
+def compact_day(day, root=CHECK_ARCHIVE_DIR):
+    """Merge a day's part files into one, dropping duplicate ids; returns rows kept"""
+    path = day_dir(day, root)
+    if not os.path.isdir(path):
+        return 0
+    remove_staging(path)
+    names = day_files(path)
+    if not names:
+        return 0
+    if names == [COMPACTED_FILE]:
+        return archived_rows(day, root)
+    table = pa.concat_tables(_conform(pq.read_table(os.path.join(path, name))) for name in names)
+    _, first = np.unique(table.column("id").to_numpy(), return_index=True)
+    table = table.take(pa.array(first)).sort_by("timestamp")
+    staging = os.path.join(path, f".{COMPACTED_FILE}.tmp")
+    _write(table, staging)
+    os.replace(staging, os.path.join(path, COMPACTED_FILE))
+    for name in names:
+        if name != COMPACTED_FILE:
+            os.remove(os.path.join(path, name))
+    return table.num_rows
+
+
+def _live_days(until):
+    """UTC days before `until` that still have checks in the database"""
+    db = SessionLocal()
+    try:
+        oldest = db.query(func.min(ApiCheck.timestamp)).filter(ApiCheck.timestamp < until).scalar()
+    finally:
+        db.close()
+    if oldest is None:
+        return []
+    oldest = as_datetime(oldest)
+    days, day = [], day_start(oldest)
+    while day < until:
+        days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def _live_ids(day):
+    end = day + timedelta(days=1)
+    with engine.connect() as conn:
+        return np.array(
+            conn.execute(
+                select(ApiCheck.id).where(ApiCheck.timestamp >= day, ApiCheck.timestamp < end)
+            ).scalars().all(),
+            dtype=np.int64
+        )
+
+
+def _archived_ids(day, root=CHECK_ARCHIVE_DIR):
+    path = day_dir(day, root)
+    if not os.path.isdir(path):
+        return np.array([], dtype=np.int64)
+    ids = [pq.read_table(os.path.join(path, name), columns=["id"], memory_map=True).column("id").to_numpy()
+           for name in day_files(path)]
+    return np.concatenate(ids) if ids else np.array([], dtype=np.int64)
+
+
+def archive_checks(until=None, root=CHECK_ARCHIVE_DIR):
+    """Export and compact every complete day before `until` (default: today)"""
+    until = day_start(until or datetime.utcnow())
+    exported = 0
+    for day in _live_days(until):
+        live = _live_ids(day)
+        if archived_rows(day, root) >= len(live) and np.isin(live, _archived_ids(day, root)).all():
+            continue
+        exported += export_day(day, root)
+        compact_day(day, root)
+    print(f"   📦 Archived {exported} check(s) to {root}")
+    return exported
+
+
+def prune_archived(before, root=CHECK_ARCHIVE_DIR):
+    """Delete checks older than `before` from the database once they're archived
+
+    A day is only deleted when every one of its checks is in the archive and
+    its rollups are complete. Returns the number of rows deleted.
+    """
+    # retention.py owns the rollup completeness check.
+    from retention import ensure_rolled_up
+
+    pruned = 0
+    for day in _live_days(day_start(before)):
+        end = day + timedelta(days=1)
+        archived = _archived_ids(day, root)
+        if not np.isin(_live_ids(day), archived).all():
+            print(f"   ⚠️ Keeping checks from {day:%Y-%m-%d}: not all of them are archived")
+            continue
+        if not ensure_rolled_up(day, end):
+            print(f"   ⚠️ Keeping checks from {day:%Y-%m-%d}: their rollups don't match the raw checks")
+            continue
+        # By id too, so a check replayed into this day meanwhile stays.
+        with engine.begin() as conn:
+            pruned += conn.execute(
+                delete(ApiCheck).where(
+                    ApiCheck.timestamp >= day, ApiCheck.timestamp < end, ApiCheck.id.in_(archived.tolist())
+                )
+            ).rowcount
+    print(f"   🗑️ Pruned {pruned} archived check(s) from the database")
+    return pruned
+
+
+def load_checks(start=None, end=None, columns=None, provider=None, root=CHECK_ARCHIVE_DIR):
+    """Archived checks in [start, end) as {column: numpy array}
+
+    Files are memory-mapped and only the requested columns are read.
+    Timestamps come back as datetime64[us], nullable numbers as float with
+    NaN, and strings as object arrays.
+    """
+    if not os.path.isdir(root):
+        return {name: np.array([]) for name in (columns or SCHEMA.names)}
+    filters = []
+    if start is not None:
+        filters.append(("timestamp", ">=", start))
+    if end is not None:
+        filters.append(("timestamp", "<", end))
+    if provider is not None:
+        filters.append(("provider", "=", provider))
+    table = pq.read_table(
+        root,
+        columns=columns,
+        filters=filters or None,
+        memory_map=True,
+        partitioning="hive",
+        read_dictionary=[name for name in DICTIONARY_COLUMNS if columns is None or name in columns],
+    )
+    arrays = {}
+    for name in columns or SCHEMA.names:
+        column = table.column(name)
+        if pa.types.is_dictionary(column.type):
+            column = column.cast(column.type.value_type)
+        arrays[name] = column.to_numpy()
+    return arrays
+
+
+if __name__ == "__main__":
+    # python check_archive.py               -> archive every complete day
+    # python check_archive.py --prune 30    -> ...then delete archived checks older than 30 days
+    init_db()
+    archive_checks()
+    if sys.argv[1:2] == ["--prune"]:
+        prune_archived(datetime.utcnow() - timedelta(days=int(sys.argv[2])))
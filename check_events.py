@@ -0,0 +1,174 @@
+# check_events.py
+"""Push new checks to the dashboard as Server-Sent Events.
+
+One broadcaster per API process watches api_checks for rows with a higher
+ID than it has seen and fans the resulting events out to every connected
+stream, so open tabs cost no queries of their own. On PostgreSQL the
+writer's CheckSink sends a NOTIFY after each write and the broadcaster
+LISTENs for it; elsewhere it polls every CHECK_EVENTS_POLL_S. It runs only
+while at least one stream is connected.
+"""
+import asyncio
+import json
+import os
+
+from sqlalchemy import text
+
+from database import async_engine, engine
+from data_version import bump_data_version
+
+CHANNEL = "api_checks"
+# Poll interval without LISTEN/NOTIFY, and the safety-net poll with it.
+CHECK_EVENTS_POLL_S = float(os.getenv("CHECK_EVENTS_POLL_S", "1"))
+CHECK_EVENTS_FALLBACK_S = float(os.getenv("CHECK_EVENTS_FALLBACK_S", "30"))
+# Comment line sent on quiet streams so proxies don't close them.
+CHECK_EVENTS_KEEPALIVE_S = float(os.getenv("CHECK_EVENTS_KEEPALIVE_S", "15"))
+# Batches a stream may fall behind before it is dropped; the browser
+# reconnects with Last-Event-ID and catches up.
+CHECK_EVENTS_QUEUE = int(os.getenv("CHECK_EVENTS_QUEUE", "100"))
+# Checks per event batch; a stream resuming further behind gets the
+# latest statuses but not every missed check.
+CHECK_EVENTS_BATCH = int(os.getenv("CHECK_EVENTS_BATCH", "500"))
+# Browser reconnect delay after a dropped stream.
+CHECK_EVENTS_RETRY_MS = int(os.getenv("CHECK_EVENTS_RETRY_MS", "5000"))
+
+
+def notify_checks():
+    """Wake the API's broadcasters after a write; a no-op off PostgreSQL"""
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_notify(:channel, '')"), {"channel": CHANNEL})
+
+
+def sse(event, data, event_id=None):
+    """One Server-Sent Events frame"""
+    frame = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{frame}event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class CheckEvents:
+    """Shared watcher of api_checks feeding per-stream queues
+
+    source(after_id) returns ([(event, event_id, data), ...], last_check_id)
+    for the checks after after_id, at most one batch; latest_id() returns
+    the current highest check ID.
+    """
+
+    def __init__(self, source, latest_id):
+        self.source = source
+        self.latest_id = latest_id
+        self.last_id = None
+        self._subscribers = set()
+        self._wake = asyncio.Event()
+        self._task = None
+        self.dropped = 0
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=CHECK_EVENTS_QUEUE)
+        self._subscribers.add(queue)
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+        return queue
+
+    def unsubscribe(self, queue):
+        self._subscribers.discard(queue)
+
+    def _broadcast(self, events):
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(events)
+            except asyncio.QueueFull:
+                # Too slow to keep up: end the stream, the client resumes from its last ID.
+                self.unsubscribe(queue)
+                self.dropped += 1
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    async def _listen(self):
+        """Connection LISTENing on CHANNEL, or None off PostgreSQL"""
+        if engine.dialect.name != "postgresql":
+            return None
+        conn = await async_engine().connect()
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.add_listener(CHANNEL, lambda *args: self._wake.set())
+        return conn
+
+    async def _close(self, listener):
+        if listener is None:
+            return
+        try:
+            # Dropped rather than pooled: it still has the listener attached.
+            await listener.invalidate()
+            await listener.close()
+        except Exception:
+            pass
+
+    async def _run(self):
+        listener = None
+        self.last_id = None
+        try:
+            while self._subscribers:
+                try:
+                    if listener is None or (await listener.get_raw_connection()).driver_connection.is_closed():
+                        await self._close(listener)
+                        listener = await self._listen()
+                    if self.last_id is None:
+                        # Read after LISTEN starts, so no write in between goes unnoticed.
+                        self.last_id = await self.latest_id()
+                    events, last_id = await self.source(self.last_id)
+                except Exception as e:
+                    print(f"   ⚠️ Check events: {e}")
+                    await self._close(listener)
+                    listener = events = None
+                if events:
+                    self.last_id = last_id
+                    # The write may come from another process: cached responses are stale too.
+                    bump_data_version()
+                    self._broadcast(events)
+                    continue  # there may be another batch
+                interval = CHECK_EVENTS_POLL_S if listener is None else CHECK_EVENTS_FALLBACK_S
+                try:
+                    await asyncio.wait_for(self._wake.wait(), interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+        finally:
+            # Before any await, so a stream subscribing now starts a new watcher.
+            self._task = None
+            await self._close(listener)
+
+    async def stream(self, after_id=None):
+        """SSE frames for one client: missed checks after after_id, then live events"""
+        queue = self.subscribe()
+        try:
+            yield f"retry: {CHECK_EVENTS_RETRY_MS}\n\n"
+            sent_id = after_id
+            if after_id is not None:
+                events, sent_id = await self.source(after_id)
+                for event, event_id, data in events:
+                    yield sse(event, data, event_id)
+            while True:
+                try:
+                    events = await asyncio.wait_for(queue.get(), CHECK_EVENTS_KEEPALIVE_S)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if events is None:
+                    return
+                for event, event_id, data in events:
+                    # Skip checks the catch-up above already sent.
+                    if event == "check" and sent_id is not None and event_id <= sent_id:
+                        continue
+                    yield sse(event, data, event_id)
+        finally:
+            self.unsubscribe(queue)
+
+    def stats(self):
+        return {
+            "streams": len(self._subscribers),
+            "watching": self._task is not None,
+            "last_check_id": self.last_id,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,103 @@
+# check_spool.py
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+# Local append-only store for checks the database couldn't take.
+CHECK_SPOOL_PATH = os.getenv("CHECK_SPOOL_PATH", "check_spool.db")
+# Rows per replay batch once the database is reachable again.
+CHECK_REPLAY_BATCH = int(os.getenv("CHECK_REPLAY_BATCH", "5000"))
+
+
+def encode_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class CheckSpool:
+    """SQLite file of check rows keyed by probe_run_id
+
+    Appending the same probe_run_id twice keeps the first copy, and replay
+    inserts with ON CONFLICT DO NOTHING, so a row is never stored twice no
+    matter how often a write or replay is retried.
+    """
+
+    def __init__(self, path=CHECK_SPOOL_PATH, datetime_columns=("timestamp",)):
+        self.path = path
+        self.datetime_columns = set(datetime_columns)
+        self._lock = threading.Lock()
+        self._pending = None
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS spool ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "probe_run_id TEXT NOT NULL UNIQUE, "
+            "row TEXT NOT NULL)"
+        )
+        return conn
+
+    def append(self, rows):
+        """Durably store rows (dicts with a probe_run_id) until replayed"""
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO spool (probe_run_id, row) VALUES (?, ?)",
+                        [
+                            (row["probe_run_id"], json.dumps({k: encode_value(v) for k, v in row.items()}))
+                            for row in rows
+                        ]
+                    )
+            finally:
+                conn.close()
+            self._pending = True
+
+    def pending(self):
+        """Whether any rows are spooled (read from disk once, then tracked)"""
+        if self._pending is None:
+            if not os.path.exists(self.path):
+                self._pending = False
+            else:
+                conn = self._connect()
+                try:
+                    self._pending = conn.execute("SELECT EXISTS (SELECT 1 FROM spool)").fetchone()[0] == 1
+                finally:
+                    conn.close()
+        return self._pending
+
+    def replay(self, write_batch, batch_size=CHECK_REPLAY_BATCH):
+        """Hand spooled rows to write_batch(rows) in order, oldest first
+
+        A batch is deleted from the spool only after write_batch returns, so
+        a failure midway leaves it to be retried. Returns rows replayed.
+        """
+        replayed = 0
+        with self._lock:
+            if not self.pending():
+                return 0
+            conn = self._connect()
+            try:
+                while True:
+                    batch = conn.execute(
+                        "SELECT seq, row FROM spool ORDER BY seq LIMIT ?", (batch_size,)
+                    ).fetchall()
+                    if not batch:
+                        self._pending = False
+                        break
+                    rows = [json.loads(row) for _, row in batch]
+                    for row in rows:
+                        for name in self.datetime_columns:
+                            if row.get(name):
+                                row[name] = datetime.fromisoformat(row[name])
+                    write_batch(rows)
+                    with conn:
+                        conn.execute("DELETE FROM spool WHERE seq <= ?", (batch[-1][0],))
+                    replayed += len(rows)
+            finally:
+                conn.close()
+        return replayed
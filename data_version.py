@@ -0,0 +1,22 @@
+# data_version.py
+"""Process-wide counter of writes to the check data.
+
+CheckSink bumps it after every write and the API's response cache compares
+against it. Kept free of other imports so the write path can use it without
+loading the API's dependencies.
+"""
+import threading
+
+_data_version = 0
+_version_lock = threading.Lock()
+
+
+def bump_data_version():
+    """Mark every cached response stale; called by the write path"""
+    global _data_version
+    with _version_lock:
+        _data_version += 1
+
+
+def data_version():
+    return _data_version
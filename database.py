@@ -1,5 +1,7 @@
+import functools
 import os
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Text
+import uuid
+from sqlalchemy import create_engine, inspect, text, case, func, Column, Integer, String, Float, DateTime, Boolean, Text, Index, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
@@ -49,12 +51,127 @@ else:
 SessionLocal = sessionmaker(bind=engine)
 Base = declarative_base()
 
+# Async engine (asyncpg / aiosqlite) for the API with API_ASYNC_DB=1 and for
+# the LISTEN connection of check_events.py. Sized for many
+# concurrent readers; created on first use so the monitor never imports the
+# async drivers.
+API_POOL_SIZE = int(os.getenv("API_POOL_SIZE", "20"))
+API_MAX_OVERFLOW = int(os.getenv("API_MAX_OVERFLOW", "30"))
+API_POOL_TIMEOUT_S = float(os.getenv("API_POOL_TIMEOUT_S", "30"))
+_async_engine = None
+_async_sessions = None
+
+def async_database_url(url=DATABASE_URL):
+    """DATABASE_URL with its async driver: postgresql+asyncpg or sqlite+aiosqlite"""
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
+
+def async_engine():
+    """The shared async engine, created on first use"""
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        pool = {"pool_size": API_POOL_SIZE, "max_overflow": API_MAX_OVERFLOW, "pool_timeout": API_POOL_TIMEOUT_S}
+        if DATABASE_URL.startswith("postgresql://"):
+            _async_engine = create_async_engine(
+                async_database_url(),
+                connect_args={"ssl": "prefer", "timeout": 10},
+                pool_pre_ping=True,
+                **pool
+            )
+        else:
+            _async_engine = create_async_engine(async_database_url(), **pool)
+    return _async_engine
+
+def AsyncSessionLocal():
+    """New AsyncSession on the shared async engine"""
+    global _async_sessions
+    if _async_sessions is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        _async_sessions = async_sessionmaker(async_engine(), expire_on_commit=False)
+    return _async_sessions()
+
+# The API's handlers are async, but by default their queries still run on
+# the sync engine, each in a worker thread as the sync handlers used to.
+# API_ASYNC_DB=1 gives them an AsyncSession on the async engine instead; on
+# SQLite that measured 10-24% fewer req/s (api_benchmark.py), and it has
+# not been measured on PostgreSQL yet.
+API_ASYNC_DB = os.getenv("API_ASYNC_DB", "0") == "1"
+
+async def _in_thread(fn, *args, **kwargs):
+    """Run a blocking call in Starlette's worker threads (anyio's default limiter)"""
+    from anyio import to_thread
+
+    return await to_thread.run_sync(functools.partial(fn, *args, **kwargs))
+
+class ThreadedSession:
+    """The part of AsyncSession the API uses, over a sync Session in worker threads"""
+
+    def __init__(self):
+        self.session = SessionLocal()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await _in_thread(self.session.close)
+
+    async def execute(self, statement):
+        # Fetched in the thread; the frozen result is read on the event loop.
+        return (await _in_thread(lambda: self.session.execute(statement).freeze()))()
+
+    async def scalar(self, statement):
+        return await _in_thread(self.session.scalar, statement)
+
+    async def scalars(self, statement):
+        return (await self.execute(statement)).scalars()
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await _in_thread(fn, self.session, *args, **kwargs)
+
+    async def stream(self, statement):
+        return ThreadedStream(await _in_thread(self.session.execute, statement))
+
+class ThreadedStream:
+    """A streamed Result whose partitions are fetched in worker threads"""
+
+    def __init__(self, result):
+        self.result = result
+
+    async def partitions(self):
+        partitions = self.result.partitions()
+        while True:
+            rows = await _in_thread(next, partitions, None)
+            if rows is None:
+                return
+            yield rows
+
+def ApiSession():
+    """Session for the API's handlers: threaded sync by default, async with API_ASYNC_DB=1"""
+    return AsyncSessionLocal() if API_ASYNC_DB else ThreadedSession()
+
+# On PostgreSQL api_checks is partitioned by month on timestamp (see
+# retention.py). Partitioned tables need the partition key in every primary
+# key and unique constraint, so timestamp joins them there.
+PARTITIONED = engine.dialect.name == "postgresql"
+
 class ApiCheck(Base):
     """Store API check results"""
     __tablename__ = "api_checks"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+    __table_args__ = (
+        # Keyset pagination of one provider's checks, newest first (see api.py)
+        Index("ix_api_checks_provider_timestamp_id", "provider", "timestamp", "id"),
+        *((UniqueConstraint("probe_run_id", "timestamp"), {"postgresql_partition_by": "RANGE (timestamp)"})
+          if PARTITIONED else ())
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    timestamp = Column(DateTime, default=datetime.utcnow, index=True, primary_key=PARTITIONED)
     
     # Provider info
     provider = Column(String, index=True)
@@ -64,13 +181,247 @@ class ApiCheck(Base):
     latency_ms = Column(Float)
     success = Column(Boolean)
     
-    # Error tracking
+    # Error tracking. New failures reference a deduplicated signature
+    # (error_signatures.py); error_message is only set on rows from before.
     error_message = Column(Text, nullable=True)
+    error_signature_id = Column(Integer, nullable=True, index=True)
+
+    # Typed failure details, None on success. failure_category is one of
+    # failures.FAILURE_CATEGORIES; failure_latency_ms is how long the probe
+    # took to fail (latency_ms only covers successes).
+    failure_category = Column(String, nullable=True, index=True)
+    http_status = Column(Integer, nullable=True, index=True)
+    retry_after_s = Column(Float, nullable=True)
+    failure_latency_ms = Column(Float, nullable=True)
+
+    # Latency breakdown (ms). None when the phase didn't happen, e.g. no
+    # DNS/connect/TLS on a reused connection.
+    dns_ms = Column(Float, nullable=True)
+    connect_ms = Column(Float, nullable=True)
+    tls_ms = Column(Float, nullable=True)
+    ttfb_ms = Column(Float, nullable=True)
+    body_ms = Column(Float, nullable=True)
+
+    # "cold" if the probe opened a new connection (DNS/TCP/TLS), "warm" if
+    # it reused a pooled keep-alive connection
+    connection_state = Column(String, nullable=True)
+
+    # "completion" (full response) or "stream" (time to first token)
+    probe_mode = Column(String, nullable=True, default="completion")
+    # Streaming metrics: time to first token and mean gap between tokens (ms)
+    ttft_ms = Column(Float, nullable=True)
+    inter_token_ms = Column(Float, nullable=True)
+    decode_tokens_per_s = Column(Float, nullable=True)
+
+    # Seconds of wall time this sample stands for (until the next sample of
+    # the same probe); uptime is weighted by it. Burst samples are the extra
+    # probes taken while a provider is failing.
+    interval_s = Column(Float, nullable=True)
+    burst = Column(Boolean, nullable=True, default=False)
+
+    # Token counts reported by the provider's usage block
+    prompt_tokens = Column(Integer, nullable=True)
+    completion_tokens = Column(Integer, nullable=True)
+
+    # Unique per probe execution, so a check replayed from the local spool
+    # (or flushed twice around a dropped connection) is only stored once
+    probe_run_id = Column(String, nullable=True, unique=not PARTITIONED, index=True, default=lambda: uuid.uuid4().hex)
+
+# Columns that identify a stored check for ON CONFLICT DO NOTHING.
+CHECK_CONFLICT_KEY = ["probe_run_id", "timestamp"] if PARTITIONED else ["probe_run_id"]
+
+class ErrorSignature(Base):
+    """One distinct failure: error class, HTTP status and normalized message"""
+    __tablename__ = "error_signatures"
+
+    id = Column(Integer, primary_key=True)
+    # sha1 of class, status and message; the dedup key
+    fingerprint = Column(String, unique=True, index=True)
+    error_class = Column(String, nullable=True)
+    http_status = Column(Integer, nullable=True)
+    message = Column(Text)
+    first_seen = Column(DateTime, default=datetime.utcnow)
+
+class BenchmarkResult(Base):
+    """Store payload benchmark runs (kept apart from uptime checks)"""
+    __tablename__ = "benchmark_results"
+
+    id = Column(Integer, primary_key=True, index=True)
+    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+
+    provider = Column(String, index=True)
+    model = Column(String)
+
+    # Requested payload: approximate prompt size and output cap, in tokens
+    input_size = Column(Integer)
+    output_size = Column(Integer)
+
+    # Actual token counts from the provider's usage block
+    prompt_tokens = Column(Integer, nullable=True)
+    completion_tokens = Column(Integer, nullable=True)
+
+    # Time to first output token (queueing + prefill) and decode speed
+    prefill_ms = Column(Float, nullable=True)
+    decode_tokens_per_s = Column(Float, nullable=True)
+    latency_ms = Column(Float, nullable=True)
+
+    success = Column(Boolean)
+    error_message = Column(Text, nullable=True)
+
+class RollupColumns:
+    """Additive per-bucket aggregates of api_checks, one row per provider/model
+
+    Sums and counts (rather than averages) so buckets merge exactly: the
+    average over any range is sum(x_sum) / sum(x_count).
+    """
+    id = Column(Integer, primary_key=True)
+    bucket_start = Column(DateTime, index=True)
+    provider = Column(String, index=True)
+    model = Column(String)
+
+    checks = Column(Integer)
+    successful = Column(Integer)
+    burst_checks = Column(Integer)
+    # Failed checks per failures.FAILURE_CATEGORIES entry
+    timeout_failures = Column(Integer)
+    rate_limited_failures = Column(Integer)
+    server_error_failures = Column(Integer)
+    auth_failures = Column(Integer)
+    client_error_failures = Column(Integer)
+    connection_failures = Column(Integer)
+    empty_response_failures = Column(Integer)
+    sla_exceeded_failures = Column(Integer)
+    other_failures = Column(Integer)
+    # Time-weighted uptime inputs (see sample_weight below)
+    covered_s = Column(Float)
+    healthy_s = Column(Float)
+
+    # End-to-end latency of non-streaming checks
+    latency_sum = Column(Float)
+    latency_count = Column(Integer)
+    latency_min = Column(Float, nullable=True)
+    latency_max = Column(Float, nullable=True)
+    # Mergeable quantile sketch of the same latencies (latency_sketch.py)
+    latency_sketch = Column(Text, nullable=True)
+    ttft_sum = Column(Float)
+    ttft_count = Column(Integer)
+    inter_token_sum = Column(Float)
+    inter_token_count = Column(Integer)
+    cold_latency_sum = Column(Float)
+    cold_latency_count = Column(Integer)
+    warm_latency_sum = Column(Float)
+    warm_latency_count = Column(Integer)
+    handshake_sum = Column(Float)
+    handshake_count = Column(Integer)
+
+    dns_ms_sum = Column(Float)
+    dns_ms_count = Column(Integer)
+    connect_ms_sum = Column(Float)
+    connect_ms_count = Column(Integer)
+    tls_ms_sum = Column(Float)
+    tls_ms_count = Column(Integer)
+    ttfb_ms_sum = Column(Float)
+    ttfb_ms_count = Column(Integer)
+    body_ms_sum = Column(Float)
+    body_ms_count = Column(Integer)
+
+class HourlyRollup(RollupColumns, Base):
+    """api_checks aggregated per hour (see rollups.py)"""
+    __tablename__ = "check_rollups_hourly"
+    __table_args__ = (UniqueConstraint("bucket_start", "provider", "model"),)
+
+class DailyRollup(RollupColumns, Base):
+    """Hourly rollups aggregated per UTC day"""
+    __tablename__ = "check_rollups_daily"
+    __table_args__ = (UniqueConstraint("bucket_start", "provider", "model"),)
+
+# End-to-end latency of non-streaming checks. Streaming rows are ranked by
+# ttft_ms instead, so they're left out of latency averages.
+end_to_end_latency = case((ApiCheck.probe_mode == "stream", None), else_=ApiCheck.latency_ms)
+
+# Rows from before interval_s existed were hourly samples.
+DEFAULT_SAMPLE_INTERVAL_S = 3600.0
+sample_weight = func.coalesce(ApiCheck.interval_s, DEFAULT_SAMPLE_INTERVAL_S)
+# Time-weighted uptime = sum(weighted_success) / sum(sample_weight)
+weighted_success = case((ApiCheck.success == True, sample_weight), else_=0)
+
+# Time spent setting up a new connection (DNS + TCP connect + TLS).
+handshake_ms = (
+    func.coalesce(ApiCheck.dns_ms, 0)
+    + func.coalesce(ApiCheck.connect_ms, 0)
+    + func.coalesce(ApiCheck.tls_ms, 0)
+)
+
+def as_datetime(value):
+    """A DATETIME from a query result as a datetime
+
+    SQLite returns aggregates of a DATETIME column (min(), max()) as text.
+    """
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+def add_missing_columns():
+    """create_all() never alters existing tables, so add new nullable columns here"""
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        missing = [column for column in table.columns if column.name not in existing]
+        if not missing:
+            continue
+        with engine.begin() as conn:
+            for column in missing:
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                print(f"   ➕ Added column {table.name}.{column.name}")
+
+def add_missing_indexes():
+    """create_all() skips indexes on tables that already exist, so create them here"""
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=engine)
+                print(f"   ➕ Added index {index.name}")
 
 def init_db():
     """Create database tables"""
     try:
+        inspector = inspect(engine)
+        # New rollup tables or columns start empty, so rebuild them from the checks.
+        new_rollups = not inspector.has_table(HourlyRollup.__tablename__) or any(
+            column.name not in {c["name"] for c in inspector.get_columns(HourlyRollup.__tablename__)}
+            for column in HourlyRollup.__table__.columns
+        )
+        new_signatures = not inspector.has_table(ErrorSignature.__tablename__)
+        untyped_failures = inspector.has_table(ApiCheck.__tablename__) and "failure_category" not in {
+            c["name"] for c in inspector.get_columns(ApiCheck.__tablename__)
+        }
         Base.metadata.create_all(bind=engine)
+        add_missing_columns()
+        if PARTITIONED:
+            # retention.py imports this module.
+            from retention import ensure_partitions, partition_api_checks
+            partition_api_checks()
+            ensure_partitions()
+        add_missing_indexes()
+        if new_signatures:
+            # Existing error_message text moves into signatures once.
+            from error_signatures import backfill_error_signatures
+            backfill_error_signatures()
+        if untyped_failures:
+            # Typed failure columns are filled in from the signatures once.
+            from error_signatures import backfill_failure_categories
+            backfill_failure_categories()
+        if new_rollups:
+            # Backfill from existing checks; rollups.py imports this module.
+            from rollups import rebuild_rollups
+            rebuild_rollups()
         print("✅ Database initialized successfully")
     except Exception as e:
         print(f"❌ Database initialization failed: {e}")
@@ -0,0 +1,171 @@
+# error_signatures.py
+"""Deduplicated error signatures for failed checks.
+
+A failure's text is reduced to a fingerprint: the error class, the HTTP
+status if there is one, and the message with request IDs, UUIDs, long hex
+strings and numbers masked. Each distinct fingerprint is stored once in
+error_signatures, and api_checks rows reference it by error_signature_id
+instead of carrying the full text.
+"""
+import hashlib
+import re
+import threading
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from database import SessionLocal, ApiCheck, ErrorSignature, engine
+from failures import category_from_error
+
+# Kept messages are cut to this many characters after masking.
+MAX_MESSAGE_CHARS = 300
+
+# "RateLimitError: ...", "timeout: ...": the class a probe prefixed.
+ERROR_CLASS = re.compile(r"^([A-Za-z_][\w.]*): ")
+HTTP_STATUS = (
+    re.compile(r"Error code: (\d{3})"),         # openai, anthropic
+    re.compile(r"^(\d{3}) [A-Z_]+\b"),           # google-genai
+    re.compile(r"status(?:[ _]code)?[=: ]+(\d{3})", re.IGNORECASE),
+)
+# Volatile parts of provider messages, most specific first.
+MASKS = (
+    (re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.IGNORECASE), "<uuid>"),
+    (re.compile(r"\b(?:req|msg|chatcmpl|resp)[_-][A-Za-z0-9]+"), "<id>"),
+    (re.compile(r"\b[0-9a-f]{16,}\b", re.IGNORECASE), "<hex>"),
+    (re.compile(r"\d+(?:\.\d+)?"), "#"),
+    (re.compile(r"\s+"), " "),
+)
+
+
+def fingerprint(error):
+    """(error_class, http_status, normalized message, fingerprint hash) of an error text"""
+    message = error.strip()
+    match = ERROR_CLASS.match(message)
+    error_class = match.group(1) if match else None
+    if match:
+        message = message[match.end():]
+    http_status = None
+    for pattern in HTTP_STATUS:
+        status = pattern.search(message)
+        if status:
+            http_status = int(status.group(1))
+            break
+    for pattern, replacement in MASKS:
+        message = pattern.sub(replacement, message)
+    message = message.strip()[:MAX_MESSAGE_CHARS]
+    key = f"{error_class}|{http_status}|{message}"
+    return error_class, http_status, message, hashlib.sha1(key.encode()).hexdigest()
+
+
+# fingerprint hash -> error_signatures.id; signatures are never changed.
+_signature_ids = {}
+_lock = threading.Lock()
+
+
+def signature_ids(errors):
+    """error text -> error_signatures.id, inserting new signatures"""
+    fingerprints = {error: fingerprint(error) for error in set(errors)}
+    with _lock:
+        missing = {fp[3]: fp for fp in fingerprints.values() if fp[3] not in _signature_ids}
+        if missing:
+            dialects = {"postgresql": postgresql, "sqlite": sqlite}
+            insert = dialects[engine.dialect.name].insert(ErrorSignature).on_conflict_do_nothing(
+                index_elements=["fingerprint"]
+            )
+            now = datetime.utcnow()
+            with engine.begin() as conn:
+                conn.execute(insert, [
+                    {"fingerprint": key, "error_class": error_class, "http_status": http_status,
+                     "message": message, "first_seen": now}
+                    for error_class, http_status, message, key in missing.values()
+                ])
+                _signature_ids.update(conn.execute(
+                    select(ErrorSignature.fingerprint, ErrorSignature.id)
+                    .where(ErrorSignature.fingerprint.in_(list(missing)))
+                ).all())
+        return {error: _signature_ids[fp[3]] for error, fp in fingerprints.items()}
+
+
+def attach_signatures(rows):
+    """Swap each row's error_message for an error_signature_id, in place"""
+    ids = signature_ids(row["error_message"] for row in rows if row.get("error_message"))
+    for row in rows:
+        error = row.get("error_message")
+        if error:
+            row["error_signature_id"] = ids[error]
+            row["error_message"] = None
+
+
+def backfill_error_signatures():
+    """Move error_message text of existing checks into signatures"""
+    db = SessionLocal()
+    try:
+        errors = [
+            error for (error,) in db.query(ApiCheck.error_message).filter(
+                ApiCheck.error_message.isnot(None), ApiCheck.error_signature_id.is_(None)
+            ).distinct()
+        ]
+        ids = signature_ids(errors)
+        for error, signature_id in ids.items():
+            db.query(ApiCheck).filter(ApiCheck.error_message == error).update(
+                {"error_signature_id": signature_id, "error_message": None}, synchronize_session=False
+            )
+        db.commit()
+    finally:
+        db.close()
+    if errors:
+        print(f"   🏷️ Fingerprinted {len(errors)} distinct error message(s)")
+    return len(errors)
+
+
+def backfill_failure_categories():
+    """Derive failure_category and http_status for failed checks stored before them"""
+    db = SessionLocal()
+    try:
+        untyped = (ApiCheck.success == False, ApiCheck.failure_category.is_(None))
+        updated = 0
+        for signature in db.query(ErrorSignature).all():
+            updated += db.query(ApiCheck).filter(*untyped, ApiCheck.error_signature_id == signature.id).update(
+                {
+                    "failure_category": category_from_error(signature.error_class, signature.http_status, signature.message),
+                    "http_status": signature.http_status,
+                },
+                synchronize_session=False
+            )
+        updated += db.query(ApiCheck).filter(*untyped).update({"failure_category": "other"}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+    if updated:
+        print(f"   🏷️ Categorized {updated} earlier failure(s)")
+    return updated
+
+
+def error_breakdown(db, start, end=None, provider=None):
+    """Failures per provider and signature in [start, end), most frequent first"""
+    counts = db.query(
+        ApiCheck.provider, ApiCheck.error_signature_id, func.count(ApiCheck.id).label("failures")
+    ).filter(ApiCheck.timestamp >= start, ApiCheck.error_signature_id.isnot(None))
+    if end is not None:
+        counts = counts.filter(ApiCheck.timestamp < end)
+    if provider is not None:
+        counts = counts.filter(ApiCheck.provider == provider)
+    counts = counts.group_by(ApiCheck.provider, ApiCheck.error_signature_id).subquery()
+    rows = (
+        db.query(counts.c.provider, counts.c.failures, ErrorSignature)
+        .join(ErrorSignature, ErrorSignature.id == counts.c.error_signature_id)
+        .order_by(counts.c.failures.desc())
+        .all()
+    )
+    return [
+        {
+            "provider": provider,
+            "signature_id": signature.id,
+            "error_class": signature.error_class,
+            "http_status": signature.http_status,
+            "message": signature.message,
+            "failures": failures,
+        }
+        for provider, failures, signature in rows
+    ]
@@ -0,0 +1,90 @@
+# failures.py
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# Values of ApiCheck.failure_category. Each also has a `<category>_failures`
+# counter on the rollup tables.
+FAILURE_CATEGORIES = (
+    "timeout",          # no response within the probe or run deadline
+    "rate_limited",     # HTTP 429
+    "server_error",     # HTTP 5xx
+    "auth",             # HTTP 401/403
+    "client_error",     # any other HTTP 4xx
+    "connection",       # DNS, connect or TLS failure, connection reset
+    "empty_response",   # answered, but with no text
+    "sla_exceeded",     # answered, but slower than the SLA threshold
+    "other",
+)
+
+
+def status_category(status):
+    if status == 429:
+        return "rate_limited"
+    if status in (401, 403):
+        return "auth"
+    if 500 <= status <= 599:
+        return "server_error"
+    if 400 <= status <= 499:
+        return "client_error"
+    return "other"
+
+
+def category_from_error(error_class, http_status, message):
+    """Best-effort category for a failure known only by its error signature"""
+    if http_status is not None:
+        return status_category(http_status)
+    error_class = error_class or ""
+    if error_class == "timeout" or "Timeout" in error_class:
+        return "timeout"
+    if "Connect" in error_class:
+        return "connection"
+    if message.startswith("empty response"):
+        return "empty_response"
+    if message.startswith("latency exceeded threshold"):
+        return "sla_exceeded"
+    return "other"
+
+
+def retry_after_seconds(headers):
+    """Seconds from retry-after-ms / Retry-After (delta or HTTP date), or None"""
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            when = parsedate_to_datetime(value)
+            return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def classify_exception(e):
+    """failure_category, http_status and retry_after_s for a probe exception
+
+    Works off attributes the provider SDKs share (status_code or code, and
+    the httpx response), so no SDK has to be imported to classify.
+    """
+    status = getattr(e, "status_code", None)
+    if not isinstance(status, int):
+        status = getattr(e, "code", None)  # google-genai APIError
+    if not isinstance(status, int) or not 100 <= status <= 599:
+        status = None
+    response = getattr(e, "response", None)
+    retry_after = retry_after_seconds(getattr(response, "headers", None))
+
+    name = type(e).__name__
+    if status is not None:
+        category = status_category(status)
+    elif "Timeout" in name:
+        category = "timeout"
+    elif "Connect" in name or isinstance(e, OSError):
+        category = "connection"
+    else:
+        category = "other"
+    return {"failure_category": category, "http_status": status, "retry_after_s": retry_after}
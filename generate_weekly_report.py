@@ -1,9 +1,9 @@
 from datetime import datetime, timedelta
 from pathlib import Path
 
-from sqlalchemy import Integer, func
-
-from database import ApiCheck, SessionLocal
+from database import SessionLocal
+from failures import FAILURE_CATEGORIES
+from rollups import query_rollups
 
 
 def pct(value: float) -> str:
@@ -17,33 +17,23 @@ def ms(value: float | None) -> str:
 
 
 def query_window(db, start: datetime, end: datetime):
-    rows = (
-        db.query(
-            ApiCheck.provider,
-            func.count(ApiCheck.id).label("total"),
-            func.sum(func.cast(ApiCheck.success, Integer)).label("successful"),
-            func.avg(ApiCheck.latency_ms).label("avg_latency"),
-            func.min(ApiCheck.latency_ms).label("min_latency"),
-            func.max(ApiCheck.latency_ms).label("max_latency"),
-        )
-        .filter(ApiCheck.timestamp >= start, ApiCheck.timestamp < end)
-        .group_by(ApiCheck.provider)
-        .order_by(ApiCheck.provider)
-        .all()
-    )
-
     data = {}
-    for r in rows:
-        total = int(r.total or 0)
-        successful = int(r.successful or 0)
-        uptime = (successful / total * 100.0) if total else 0.0
-        data[r.provider] = {
-            "total": total,
-            "successful": successful,
-            "uptime": uptime,
-            "avg_latency": float(r.avg_latency) if r.avg_latency is not None else None,
-            "min_latency": float(r.min_latency) if r.min_latency is not None else None,
-            "max_latency": float(r.max_latency) if r.max_latency is not None else None,
+    # Hourly rollups that start inside the window.
+    for s in query_rollups(db, start, end):
+        data[s["provider"]] = {
+            "total": s["total"],
+            "successful": s["successful"],
+            "covered_s": s["covered_s"],
+            "healthy_s": s["healthy_s"],
+            "uptime": s["uptime"],
+            "avg_latency": s["avg_latency"],
+            "min_latency": s["min_latency"],
+            "max_latency": s["max_latency"],
+            "p50_latency": s["p50_latency"],
+            "p95_latency": s["p95_latency"],
+            "p99_latency": s["p99_latency"],
+            "avg_ttft": s["avg_ttft"],
+            "failures": s["failures"],
         }
     return data
 
@@ -96,6 +86,13 @@ def pick_biggest_regression(current, previous):
     return f"{worst_provider} ({reason_text})"
 
 
+def pick_fastest_first_token(current):
+    candidates = [(s["avg_ttft"], provider) for provider, s in current.items() if s["avg_ttft"] is not None]
+    if not candidates:
+        return None
+    return min(candidates)[1]
+
+
 def make_operational_recommendation(best_provider, biggest_regression):
     if not best_provider and not biggest_regression:
         return "Collect another full week of data before making routing changes."
@@ -137,16 +134,24 @@ def build_report() -> str:
                     "avg_latency": s["avg_latency"],
                     "min_latency": s["min_latency"],
                     "max_latency": s["max_latency"],
+                    "p50_latency": s["p50_latency"],
+                    "p95_latency": s["p95_latency"],
+                    "p99_latency": s["p99_latency"],
+                    "avg_ttft": s["avg_ttft"],
+                    "failures": s["failures"],
                 }
             )
 
         total_checks = sum(r["total"] for r in rows) if rows else 0
         total_success = sum(r["successful"] or 0 for r in rows) if rows else 0
-        overall_uptime = (total_success / total_checks * 100) if total_checks else 0.0
+        covered_s = sum(s["covered_s"] for s in current.values())
+        healthy_s = sum(s["healthy_s"] for s in current.values())
+        overall_uptime = (healthy_s / covered_s * 100) if covered_s else 0.0
 
         best_provider = pick_best_provider(current)
         biggest_regression = pick_biggest_regression(current, previous)
         recommendation = make_operational_recommendation(best_provider, biggest_regression)
+        fastest_first_token = pick_fastest_first_token(current)
 
         lines = []
         lines.append("# AI API Weekly Reliability Report")
@@ -158,6 +163,7 @@ def build_report() -> str:
         lines.append("")
         lines.append(f"- Best provider this week: {best_provider or 'N/A'}")
         lines.append(f"- Biggest regression: {biggest_regression or 'No material regression detected'}")
+        lines.append(f"- Fastest time to first token: {fastest_first_token or 'N/A'}")
         lines.append(f"- Operational recommendation: {recommendation}")
         lines.append("")
         lines.append("## Overview")
@@ -172,18 +178,39 @@ def build_report() -> str:
         if not rows:
             lines.append("No data available for the last 7 days.")
         else:
-            lines.append("| Provider | Checks | Success | Uptime | Avg Latency | Min | Max |")
-            lines.append("|---|---:|---:|---:|---:|---:|---:|")
+            lines.append("| Provider | Checks | Success | Uptime | Avg Latency | P50 | P95 | P99 | Min | Max | Avg TTFT |")
+            lines.append("|---|---:|---:|---:|---:|---:|---:|---:|---:|---:|---:|")
             for r in rows:
                 lines.append(
-                    f"| {r['provider']} | {r['total']} | {r['successful']} | {pct(r['uptime'])} | {ms(r['avg_latency'])} | {ms(r['min_latency'])} | {ms(r['max_latency'])} |"
+                    f"| {r['provider']} | {r['total']} | {r['successful']} | {pct(r['uptime'])} | {ms(r['avg_latency'])} | {ms(r['p50_latency'])} | {ms(r['p95_latency'])} | {ms(r['p99_latency'])} | {ms(r['min_latency'])} | {ms(r['max_latency'])} | {ms(r['avg_ttft'])} |"
                 )
 
+            ttft_rows = sorted((r for r in rows if r["avg_ttft"] is not None), key=lambda r: r["avg_ttft"])
+            if ttft_rows:
+                lines.append("")
+                lines.append("## Time to First Token Ranking")
+                lines.append("")
+                for rank, r in enumerate(ttft_rows, start=1):
+                    lines.append(f"{rank}. {r['provider']}: {ms(r['avg_ttft'])}")
+
+            categories = [c for c in FAILURE_CATEGORIES if any(r["failures"][c] for r in rows)]
+            if categories:
+                lines.append("")
+                lines.append("## Failure Breakdown")
+                lines.append("")
+                lines.append("| Provider | " + " | ".join(c.replace("_", " ").title() for c in categories) + " |")
+                lines.append("|---|" + "---:|" * len(categories))
+                for r in rows:
+                    lines.append(f"| {r['provider']} | " + " | ".join(str(r["failures"][c]) for c in categories) + " |")
+
         lines.append("")
         lines.append("## Notes")
         lines.append("")
         lines.append("- Latency values are based on successful checks in the selected window.")
+        lines.append("- Avg/Min/Max latency come from full (non-streaming) responses; TTFT comes from streaming probes.")
+        lines.append("- P50/P95/P99 come from merged hourly latency sketches and are accurate to within 1%.")
         lines.append("- Failed checks are included in uptime calculations.")
+        lines.append("- Uptime is time-weighted: each check counts for the time until the next one.")
 
         return "\n".join(lines)
     finally:
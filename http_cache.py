@@ -0,0 +1,154 @@
+# http_cache.py
+"""Conditional GETs and precompressed response bodies.
+
+A body is serialized and compressed once (gzip, plus brotli when the
+package is installed) into an EncodedBody; each request then only picks
+the variant its Accept-Encoding allows, or gets 304 Not Modified when its
+If-None-Match / If-Modified-Since shows it already has the body. JSON
+bodies are built when the response cache fills an entry, the dashboard
+HTML once at import.
+"""
+import gzip
+import hashlib
+import json
+import os
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Browsers revalidate after max-age; a CDN keeps serving its copy for
+# s-maxage and refreshes it in the background for stale-while-revalidate.
+API_CACHE_CONTROL = os.getenv("API_CACHE_CONTROL", "public, max-age=30, s-maxage=60, stale-while-revalidate=300")
+DASHBOARD_CACHE_CONTROL = os.getenv("DASHBOARD_CACHE_CONTROL", "public, max-age=300, stale-while-revalidate=86400")
+# Smaller bodies go out uncompressed; the framing would eat the saving.
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+
+# Preferred first. Each variant gets its own strong ETag, the base tag plus a suffix.
+ENCODINGS = ("br", "gzip")
+ETAG_SUFFIXES = {"br": "-br", "gzip": "-gz"}
+
+
+def accepted_encodings(header):
+    """Content codings an Accept-Encoding header allows (q > 0)"""
+    accepted = set()
+    for item in (header or "").split(","):
+        coding, _, params = item.partition(";")
+        quality = 1.0
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                pass
+        if coding.strip() and quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def etag_bases(header):
+    """Base tags listed in an If-None-Match header, any variant suffix removed"""
+    bases = set()
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):  # proxies weaken tags of bodies they re-encode
+            tag = tag[2:]
+        tag = tag.strip('"')
+        for suffix in ETAG_SUFFIXES.values():
+            if tag.endswith(suffix):
+                tag = tag[:-len(suffix)]
+                break
+        bases.add(tag)
+    return bases
+
+
+class EncodedBody:
+    """A response body with its ETag, Last-Modified and compressed variants"""
+
+    def __init__(self, body, media_type, etag, last_modified=None, cache_control=API_CACHE_CONTROL,
+                 brotli_quality=5, windowed=False):
+        self.media_type = media_type
+        self.etag = etag
+        self.last_modified = last_modified
+        # Computed over a window ending now: the body changes as the window
+        # slides even when no check is newer than Last-Modified.
+        self.windowed = windowed
+        self.cache_control = cache_control
+        self.variants = {"identity": body}
+        if len(body) >= COMPRESS_MIN_BYTES:
+            self.variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.variants["br"] = brotli.compress(body, quality=brotli_quality)
+
+    def encoding_for(self, accept_encoding):
+        accepted = accepted_encodings(accept_encoding)
+        for encoding in ENCODINGS:
+            if encoding in self.variants and (encoding in accepted or "*" in accepted):
+                return encoding
+        return "identity"
+
+    def headers(self, encoding):
+        headers = {
+            "ETag": f'"{self.etag}{ETAG_SUFFIXES.get(encoding, "")}"',
+            "Cache-Control": self.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(self.last_modified, usegmt=True)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return headers
+
+    def not_modified(self, request):
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            # If-Modified-Since is ignored when a tag is sent (RFC 9110 13.1.3)
+            return if_none_match.strip() == "*" or self.etag in etag_bases(if_none_match)
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since and self.last_modified is not None and not self.windowed:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            if since.tzinfo is None:
+                return False
+            return self.last_modified.replace(microsecond=0) <= since
+        return False
+
+    def respond(self, request):
+        """200 with the best variant for the request, or an empty 304"""
+        encoding = self.encoding_for(request.headers.get("accept-encoding"))
+        headers = self.headers(encoding)
+        if self.not_modified(request):
+            return Response(status_code=304, headers=headers)
+        return Response(self.variants[encoding], media_type=self.media_type, headers=headers)
+
+
+def json_body(value, version=None, last_modified=None, windowed=False):
+    """EncodedBody of a route's return value, serialized like FastAPI's JSONResponse
+
+    The ETag is the data version (e.g. the latest check ID) plus a digest of
+    the body, so it stays strong: equal tags always mean identical bytes.
+    A windowed body only answers 304 to If-None-Match, never to
+    If-Modified-Since.
+    """
+    body = json.dumps(
+        jsonable_encoder(value), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+    digest = hashlib.sha1(body).hexdigest()[:16]
+    etag = digest if version is None else f"{version}-{digest}"
+    return EncodedBody(body, "application/json", etag, last_modified, windowed=windowed)
+
+
+def html_body(html):
+    """EncodedBody of a static page, compressed as hard as brotli goes"""
+    body = html.encode("utf-8")
+    return EncodedBody(
+        body, "text/html; charset=utf-8", hashlib.sha1(body).hexdigest()[:16],
+        cache_control=DASHBOARD_CACHE_CONTROL, brotli_quality=11
+    )
@@ -0,0 +1,85 @@
+# latency_sketch.py
+import json
+import math
+
+# Quantiles are accurate to within this fraction of the true value.
+RELATIVE_ACCURACY = 0.01
+
+
+class LatencySketch:
+    """DDSketch-style quantile sketch: counts per logarithmic bucket
+
+    Bucket i holds values in (gamma^(i-1), gamma^i], so any quantile is
+    returned within RELATIVE_ACCURACY of the true value. Sketches merge by
+    adding bucket counts, which makes hourly sketches combine exactly into
+    any longer window. Latencies from 1ms to 10min fit in ~660 buckets.
+    """
+
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY, bins=None, zero_count=0):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins = dict(bins or {})
+        self.zero_count = zero_count
+
+    @property
+    def count(self):
+        return self.zero_count + sum(self.bins.values())
+
+    def add(self, value):
+        if value is None:
+            return
+        if value <= 0:
+            self.zero_count += 1
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self.bins[index] = self.bins.get(index, 0) + 1
+
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("can't merge sketches with different accuracy")
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.zero_count += other.zero_count
+        return self
+
+    def quantile(self, q):
+        """Value at quantile q (0..1), or None for an empty sketch"""
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return 0.0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                # Midpoint (in relative terms) of (gamma^(i-1), gamma^i].
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+    def percentiles(self):
+        return {"p50": self.quantile(0.50), "p95": self.quantile(0.95), "p99": self.quantile(0.99)}
+
+    def to_json(self):
+        return json.dumps(
+            {"a": self.relative_accuracy, "z": self.zero_count, "b": self.bins},
+            separators=(",", ":")
+        )
+
+    @classmethod
+    def from_json(cls, data):
+        if not data:
+            return cls()
+        raw = json.loads(data)
+        return cls(raw["a"], {int(i): c for i, c in raw["b"].items()}, raw.get("z", 0))
+
+
+def merge_sketches(serialized):
+    """Merge an iterable of to_json() strings (None entries are skipped)"""
+    merged = LatencySketch()
+    for data in serialized:
+        if data:
+            merged.merge(LatencySketch.from_json(data))
+    return merged
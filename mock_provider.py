@@ -0,0 +1,342 @@
+# mock_provider.py
+"""Local stand-in for the OpenAI, Anthropic and Gemini APIs.
+
+Point the SDK clients at it with OPENAI_BASE_URL, ANTHROPIC_BASE_URL and
+GOOGLE_BASE_URL (see README). It speaks plain HTTP/1.1 with keep-alive on a
+bare asyncio server, so it can serve thousands of requests per second and
+benchmarks measure the monitor rather than the stand-in.
+"""
+import asyncio
+import json
+import math
+import os
+import random
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+MOCK_HOST = os.getenv("MOCK_HOST", "127.0.0.1")
+MOCK_PORT = int(os.getenv("MOCK_PORT", "8900"))
+# Time before the response (or first streamed token): fixed:MS, uniform:LO,HI,
+# normal:MEAN,STDDEV or lognormal:MEDIAN,SIGMA.
+MOCK_LATENCY = os.getenv("MOCK_LATENCY", "fixed:0")
+# Gap between streamed tokens, same syntax.
+MOCK_TOKEN_LATENCY = os.getenv("MOCK_TOKEN_LATENCY", "fixed:0")
+# Injected failures as status=probability, e.g. "429=0.02,500=0.01,503=0.01".
+MOCK_ERRORS = os.getenv("MOCK_ERRORS", "")
+# Retry-After header sent with injected 429s.
+MOCK_RETRY_AFTER_S = os.getenv("MOCK_RETRY_AFTER_S", "1")
+MOCK_RESPONSE_TEXT = os.getenv("MOCK_RESPONSE_TEXT", "OK")
+MOCK_SEED = os.getenv("MOCK_SEED")
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 429: "Too Many Requests",
+           500: "Internal Server Error", 502: "Bad Gateway", 503: "Service Unavailable",
+           529: "Overloaded"}
+
+
+def parse_distribution(spec):
+    """Turn "kind:a,b" into a function returning a delay in seconds"""
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v.strip()] or [0.0]
+    kind = kind.strip().lower()
+    if kind == "fixed":
+        return lambda rng: values[0] / 1000
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1])) / 1000
+    if kind == "lognormal":
+        mu = math.log(max(values[0], 1e-6))
+        return lambda rng: rng.lognormvariate(mu, values[1]) / 1000
+    raise ValueError(f"unknown latency distribution: {spec}")
+
+
+def parse_errors(spec):
+    """Turn "429=0.02,500=0.01" into [(status, probability)]"""
+    errors = []
+    for item in spec.split(","):
+        if item.strip():
+            status, _, rate = item.partition("=")
+            errors.append((int(status), float(rate)))
+    return errors
+
+
+def approx_tokens(text):
+    return max(1, len(text) // 4)
+
+
+class MockProvider:
+    """Request handler plus per-route counters for one mock server"""
+
+    def __init__(self, latency=None, token_latency=None, errors=None, text=None,
+                 retry_after_s=None, seed=None):
+        self.latency = parse_distribution(latency or MOCK_LATENCY)
+        self.token_latency = parse_distribution(token_latency or MOCK_TOKEN_LATENCY)
+        self.errors = parse_errors(MOCK_ERRORS if errors is None else errors)
+        self.text = MOCK_RESPONSE_TEXT if text is None else text
+        self.retry_after_s = MOCK_RETRY_AFTER_S if retry_after_s is None else str(retry_after_s)
+        seed = MOCK_SEED if seed is None else seed
+        self.rng = random.Random(None if seed is None else int(seed))
+        self.requests = {}
+        self.statuses = {}
+
+    # --- HTTP plumbing ---
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                method, target, _ = request_line.split(" ", 2)
+                headers = {}
+                for line in header_lines:
+                    if line:
+                        name, _, value = line.partition(":")
+                        headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                await self.dispatch(method, target, body, writer)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except Exception as e:
+            print(f"⚠️ Mock server error: {e}")
+        finally:
+            writer.close()
+
+    def write_head(self, writer, status, headers):
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        lines = [f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+    async def send_json(self, writer, status, payload, extra_headers=None):
+        body = json.dumps(payload).encode()
+        self.write_head(writer, status, {
+            "content-type": "application/json",
+            "content-length": len(body),
+            **(extra_headers or {}),
+        })
+        writer.write(body)
+        await writer.drain()
+
+    async def send_events(self, writer, events):
+        """Stream (event_name, payload, is_token) as chunked server-sent events
+
+        Token events after the first are delayed by the token latency.
+        """
+        self.write_head(writer, 200, {
+            "content-type": "text/event-stream",
+            "cache-control": "no-cache",
+            "transfer-encoding": "chunked",
+        })
+        first_token = True
+        for name, payload, is_token in events:
+            if is_token and not first_token:
+                await asyncio.sleep(self.token_latency(self.rng))
+            first_token = first_token and not is_token
+            data = payload if isinstance(payload, str) else json.dumps(payload)
+            event = f"data: {data}\n\n"
+            if name:
+                event = f"event: {name}\n{event}"
+            chunk = event.encode()
+            writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    # --- routing ---
+
+    async def dispatch(self, method, target, body, writer):
+        url = urlsplit(target)
+        path = url.path.rstrip("/")
+        if method != "POST":
+            return await self.send_json(writer, 404, {"error": {"message": f"no route for {method} {path}"}})
+
+        if path.endswith("/chat/completions"):
+            route, handler, error_body = "openai", self.openai, openai_error
+        elif path.endswith("/messages"):
+            route, handler, error_body = "anthropic", self.anthropic, anthropic_error
+        elif ":generateContent" in path or ":streamGenerateContent" in path:
+            route, handler, error_body = "google", self.google, google_error
+        else:
+            return await self.send_json(writer, 404, {"error": {"message": f"no route for {path}"}})
+        self.requests[route] = self.requests.get(route, 0) + 1
+
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            return await self.send_json(writer, 400, error_body(400, "invalid JSON body"))
+
+        await asyncio.sleep(self.latency(self.rng))
+        status = self.injected_error()
+        if status:
+            headers = {"retry-after": self.retry_after_s} if status == 429 else None
+            return await self.send_json(writer, status, error_body(status, "injected by mock_provider"), headers)
+        await handler(path, request, writer)
+
+    def injected_error(self):
+        roll = self.rng.random()
+        for status, rate in self.errors:
+            if roll < rate:
+                return status
+            roll -= rate
+        return None
+
+    def tokens(self):
+        """Split the response text into stream deltas"""
+        words = self.text.split(" ")
+        return [w if i == 0 else " " + w for i, w in enumerate(words)]
+
+    # --- providers ---
+
+    async def openai(self, path, request, writer):
+        model = request.get("model", "mock")
+        prompt_tokens = approx_tokens(json.dumps(request.get("messages", [])))
+        completion_tokens = approx_tokens(self.text)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        base = {"id": "chatcmpl-mock", "created": int(time.time()), "model": model}
+        if not request.get("stream"):
+            return await self.send_json(writer, 200, {
+                **base,
+                "object": "chat.completion",
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": self.text},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            })
+
+        def chunk(delta, finish_reason=None):
+            return {**base, "object": "chat.completion.chunk",
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+
+        events = [(None, chunk({"role": "assistant", "content": ""}), False)]
+        events += [(None, chunk({"content": t}), True) for t in self.tokens()]
+        events.append((None, chunk({}, "stop"), False))
+        if (request.get("stream_options") or {}).get("include_usage"):
+            events.append((None, {**base, "object": "chat.completion.chunk", "choices": [], "usage": usage}, False))
+        events.append((None, "[DONE]", False))
+        await self.send_events(writer, events)
+
+    async def anthropic(self, path, request, writer):
+        model = request.get("model", "mock")
+        input_tokens = approx_tokens(json.dumps(request.get("messages", [])))
+        output_tokens = approx_tokens(self.text)
+        message = {
+            "id": "msg_mock",
+            "type": "message",
+            "role": "assistant",
+            "model": model,
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+        }
+        if not request.get("stream"):
+            return await self.send_json(writer, 200, {
+                **message,
+                "content": [{"type": "text", "text": self.text}],
+                "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens},
+            })
+
+        events = [
+            ("message_start", {"type": "message_start", "message": {
+                **message, "content": [], "stop_reason": None,
+                "usage": {"input_tokens": input_tokens, "output_tokens": 1},
+            }}, False),
+            ("content_block_start", {"type": "content_block_start", "index": 0,
+                                     "content_block": {"type": "text", "text": ""}}, False),
+        ]
+        events += [
+            ("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                     "delta": {"type": "text_delta", "text": t}}, True)
+            for t in self.tokens()
+        ]
+        events += [
+            ("content_block_stop", {"type": "content_block_stop", "index": 0}, False),
+            ("message_delta", {"type": "message_delta",
+                               "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                               "usage": {"output_tokens": output_tokens}}, False),
+            ("message_stop", {"type": "message_stop"}, False),
+        ]
+        await self.send_events(writer, events)
+
+    async def google(self, path, request, writer):
+        model = path.rsplit("/", 1)[-1].split(":", 1)[0]
+        prompt_tokens = approx_tokens(json.dumps(request.get("contents", [])))
+        completion_tokens = approx_tokens(self.text)
+
+        def response(text, usage=None):
+            payload = {
+                "candidates": [{
+                    "content": {"role": "model", "parts": [{"text": text}]},
+                    "index": 0,
+                    **({"finishReason": "STOP"} if usage else {}),
+                }],
+                "modelVersion": model,
+            }
+            if usage:
+                payload["usageMetadata"] = {
+                    "promptTokenCount": prompt_tokens,
+                    "candidatesTokenCount": completion_tokens,
+                    "totalTokenCount": prompt_tokens + completion_tokens,
+                }
+            return payload
+
+        if ":streamGenerateContent" not in path:
+            return await self.send_json(writer, 200, response(self.text, usage=True))
+
+        tokens = self.tokens()
+        events = [(None, response(t, usage=(i == len(tokens) - 1)), True) for i, t in enumerate(tokens)]
+        await self.send_events(writer, events)
+
+    def stats(self):
+        return {"requests": dict(self.requests), "statuses": dict(self.statuses)}
+
+
+def openai_error(status, message):
+    kind = "rate_limit_exceeded" if status == 429 else "server_error"
+    return {"error": {"message": message, "type": kind, "code": str(status)}}
+
+
+def anthropic_error(status, message):
+    kind = {429: "rate_limit_error", 529: "overloaded_error"}.get(status, "api_error")
+    return {"type": "error", "error": {"type": kind, "message": message}}
+
+
+def google_error(status, message):
+    kind = {429: "RESOURCE_EXHAUSTED", 503: "UNAVAILABLE"}.get(status, "INTERNAL")
+    return {"error": {"code": status, "message": message, "status": kind}}
+
+
+async def start_server(provider=None, host=MOCK_HOST, port=MOCK_PORT):
+    """Start serving in the running loop; returns (asyncio.Server, MockProvider)"""
+    provider = MockProvider() if provider is None else provider
+    server = await asyncio.start_server(provider.handle_connection, host, port, backlog=1024)
+    return server, provider
+
+
+async def serve():
+    server, provider = await start_server()
+    print(f"🧪 Mock provider listening on http://{MOCK_HOST}:{MOCK_PORT}")
+    print(f"   OPENAI_BASE_URL=http://{MOCK_HOST}:{MOCK_PORT}/v1")
+    print(f"   ANTHROPIC_BASE_URL=http://{MOCK_HOST}:{MOCK_PORT}")
+    print(f"   GOOGLE_BASE_URL=http://{MOCK_HOST}:{MOCK_PORT}")
+    print(f"   latency={MOCK_LATENCY} token_latency={MOCK_TOKEN_LATENCY} errors={MOCK_ERRORS or 'none'}")
+    async with server:
+        try:
+            await server.serve_forever()
+        finally:
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] {provider.stats()}")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print("\n👋 Mock provider stopped")
@@ -0,0 +1,120 @@
+# payload_benchmark.py
+import os
+from datetime import datetime
+from dotenv import load_dotenv
+
+# Before the project imports: database and probe_engine read their settings at import.
+load_dotenv()
+
+from database import SessionLocal, BenchmarkResult, init_db
+from probe_engine import enabled_targets, run_probes
+
+# Approximate prompt sizes and output caps, in tokens.
+INPUT_SIZES = [int(n) for n in os.getenv("BENCHMARK_INPUT_TOKENS", "100,2000,32000").split(",") if n.strip()]
+OUTPUT_SIZES = [int(n) for n in os.getenv("BENCHMARK_OUTPUT_TOKENS", "16,256").split(",") if n.strip()]
+# Large prompts take far longer than the hourly SLA allows.
+BENCHMARK_TIMEOUT_S = float(os.getenv("BENCHMARK_TIMEOUT_S", "180"))
+BENCHMARK_CONCURRENCY = int(os.getenv("BENCHMARK_CONCURRENCY", "3"))
+
+# ~10 tokens per sentence with every common tokenizer.
+FILLER_SENTENCE = "The quick brown fox jumps over the lazy dog near the river. "
+
+
+def build_prompt(input_size):
+    """Filler text of roughly `input_size` tokens followed by an open-ended task"""
+    filler = FILLER_SENTENCE * max(0, input_size // 10 - 3)
+    return (
+        f"{filler}\n\n"
+        "Ignore the text above. Count upward from 1, one number per line, and keep going."
+    )
+
+
+def benchmark_matrix(targets=None, input_sizes=None, output_sizes=None):
+    """One streaming probe per target for every input/output size combination"""
+    targets = enabled_targets() if targets is None else targets
+    input_sizes = INPUT_SIZES if input_sizes is None else input_sizes
+    output_sizes = OUTPUT_SIZES if output_sizes is None else output_sizes
+    return [
+        {
+            **target,
+            "mode": "benchmark",
+            "prompt": build_prompt(input_size),
+            "max_tokens": output_size,
+            "timeout": BENCHMARK_TIMEOUT_S,
+            "input_size": input_size,
+            "output_size": output_size,
+        }
+        for input_size in input_sizes
+        for output_size in output_sizes
+        for target in targets
+    ]
+
+
+def save_benchmark_result(probe, result):
+    """Save one benchmark run to the benchmark_results table"""
+    fields = result['fields']
+    db = SessionLocal()
+    try:
+        db.add(BenchmarkResult(
+            timestamp=result['timestamp'],
+            provider=result['provider'],
+            model=result['model'],
+            input_size=probe['input_size'],
+            output_size=probe['output_size'],
+            prompt_tokens=fields.get('prompt_tokens'),
+            completion_tokens=fields.get('completion_tokens'),
+            prefill_ms=fields.get('ttft_ms'),
+            decode_tokens_per_s=fields.get('decode_tokens_per_s'),
+            latency_ms=result['latency'],
+            success=result['success'],
+            error_message=result['error']
+        ))
+        db.commit()
+    except Exception as e:
+        print(f"   ⚠️ Database error: {e}")
+    finally:
+        db.close()
+
+
+def fmt(value, spec, suffix=""):
+    return "-" if value is None else f"{value:{spec}}{suffix}"
+
+
+def run_benchmark(probes=None):
+    probes = benchmark_matrix() if probes is None else probes
+    results = run_probes(
+        probes,
+        concurrency=BENCHMARK_CONCURRENCY,
+        run_timeout=BENCHMARK_TIMEOUT_S * len(probes),
+        client_timeout=BENCHMARK_TIMEOUT_S
+    )
+
+    print(f"{'Provider':12s} {'Input':>7s} {'Output':>7s} {'Prompt tok':>11s} {'Compl tok':>10s} "
+          f"{'Prefill':>9s} {'Decode':>11s} {'Total':>9s}")
+    print("-"*84)
+    for probe, result in zip(probes, results):
+        save_benchmark_result(probe, result)
+        fields = result['fields']
+        if not result['success']:
+            print(f"{result['provider']:12s} {probe['input_size']:7d} {probe['output_size']:7d}  ❌ {result['error']}")
+            continue
+        print(f"{result['provider']:12s} {probe['input_size']:7d} {probe['output_size']:7d} "
+              f"{fmt(fields.get('prompt_tokens'), 'd'):>11s} "
+              f"{fmt(fields.get('completion_tokens'), 'd'):>10s} "
+              f"{fmt(fields.get('ttft_ms'), '.0f', 'ms'):>9s} "
+              f"{fmt(fields.get('decode_tokens_per_s'), '.1f', ' tok/s'):>11s} "
+              f"{fmt(result['latency'], '.0f', 'ms'):>9s}")
+    return results
+
+
+if __name__ == "__main__":
+    print("\n" + "="*84)
+    print("AI API MONITOR - Payload Benchmark")
+    print("="*84)
+    print(f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"Input sizes: {INPUT_SIZES}  Output sizes: {OUTPUT_SIZES}")
+    print()
+
+    init_db()
+    run_benchmark()
+    print()
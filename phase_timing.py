@@ -0,0 +1,147 @@
+# phase_timing.py
+import asyncio
+import contextvars
+import importlib
+import socket
+import time
+
+# Columns stored on ApiCheck, in request order.
+PHASES = ("dns_ms", "connect_ms", "tls_ms", "ttfb_ms", "body_ms")
+
+# httpcore trace events (without their "connection."/"http11."/"http2." prefix)
+# that open or close a phase. DNS and TCP connect are timed by TimedNetworkBackend.
+_TRACE_EVENTS = {
+    "start_tls.started": ("start", "tls_ms"),
+    "start_tls.complete": ("stop", "tls_ms"),
+    "send_request_headers.started": ("start", "ttfb_ms"),
+    "receive_response_headers.complete": ("stop", "ttfb_ms"),
+    "receive_response_body.started": ("start", "body_ms"),
+    "receive_response_body.complete": ("stop", "body_ms"),
+}
+
+_current_timer = contextvars.ContextVar("phase_timer", default=None)
+
+
+class PhaseTimer:
+    """Accumulates per-phase durations for every HTTP request made by one probe.
+
+    SDK retries add to the same totals. A phase that never happened (e.g. no
+    TLS handshake on a reused connection) is reported as None.
+    """
+
+    def __init__(self):
+        self.totals_ns = {}
+        self._started_ns = {}
+
+    def start(self, phase):
+        self._started_ns[phase] = time.perf_counter_ns()
+
+    def stop(self, phase):
+        started = self._started_ns.pop(phase, None)
+        if started is not None:
+            self.add(phase, time.perf_counter_ns() - started)
+
+    def add(self, phase, elapsed_ns):
+        self.totals_ns[phase] = self.totals_ns.get(phase, 0) + elapsed_ns
+
+    def as_ms(self):
+        return {
+            phase: self.totals_ns[phase] / 1_000_000 if phase in self.totals_ns else None
+            for phase in PHASES
+        }
+
+
+def start_timer():
+    """Bind a fresh PhaseTimer to the current asyncio task"""
+    timer = PhaseTimer()
+    _current_timer.set(timer)
+    return timer
+
+
+async def _trace(event_name, info):
+    timer = _current_timer.get()
+    if timer is None:
+        return
+    action = _TRACE_EVENTS.get(event_name.split(".", 1)[-1])
+    if action is None:
+        return
+    kind, phase = action
+    if kind == "start":
+        timer.start(phase)
+    else:
+        timer.stop(phase)
+
+
+async def _attach_trace(request):
+    request.extensions["trace"] = _trace
+
+
+class TimedNetworkBackend:
+    """Wraps an httpcore network backend and resolves the host itself, so
+    DNS and TCP connect are timed separately."""
+
+    def __init__(self, backend):
+        self._backend = backend
+        # Raise the ConnectError of whichever httpcore build we wrap, so the
+        # owning httpx client maps it like any other connect failure.
+        self._connect_error = importlib.import_module(
+            type(backend).__module__.split(".")[0]
+        ).ConnectError
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        timer = _current_timer.get()
+        start = time.perf_counter_ns()
+        try:
+            addresses = await asyncio.get_running_loop().getaddrinfo(
+                host, port, type=socket.SOCK_STREAM
+            )
+        except socket.gaierror as e:
+            raise self._connect_error(str(e)) from e
+        if timer is not None:
+            timer.add("dns_ms", time.perf_counter_ns() - start)
+
+        last_error = None
+        for *_, sockaddr in addresses:
+            start = time.perf_counter_ns()
+            try:
+                stream = await self._backend.connect_tcp(
+                    sockaddr[0],
+                    port,
+                    timeout=timeout,
+                    local_address=local_address,
+                    socket_options=socket_options
+                )
+            except self._connect_error as e:
+                last_error = e
+                continue
+            if timer is not None:
+                timer.add("connect_ms", time.perf_counter_ns() - start)
+            return stream
+        raise last_error or self._connect_error(f"no addresses for {host}")
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._backend.connect_unix_socket(
+            path, timeout=timeout, socket_options=socket_options
+        )
+
+    async def sleep(self, seconds):
+        await self._backend.sleep(seconds)
+
+
+def instrument_client(client):
+    """Add phase timing to an existing httpx (or httpx-compatible) AsyncClient"""
+    # httpx doesn't expose the network backend, so swap it on the pool.
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    if pool is not None and hasattr(pool, "_network_backend"):
+        pool._network_backend = TimedNetworkBackend(pool._network_backend)
+    hooks = client.event_hooks
+    client.event_hooks = {**hooks, "request": [*hooks.get("request", []), _attach_trace]}
+    return client
+
+
+def timed_http_client(client_class=None, **kwargs):
+    """Build an SDK-compatible httpx client that records per-phase timings"""
+    if client_class is None:
+        import httpx
+        client_class = httpx.AsyncClient
+    return instrument_client(client_class(**kwargs))
@@ -0,0 +1,234 @@
+# probe_benchmark.py
+"""Throughput benchmark for the probe -> classify_result -> save_result path.
+
+Runs the real probe engine against mock_provider.py for a growing number of
+provider/model targets and writes the numbers to JSON so runs from different
+commits can be compared. Each size runs in a fresh process so its peak memory
+is its own.
+"""
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BENCH_SIZES = [int(n) for n in os.getenv("BENCH_SIZES", "3,10,50,100,250,500").split(",") if n.strip()]
+BENCH_MODES = [m.strip() for m in os.getenv("BENCH_MODES", "completion").split(",") if m.strip()]
+BENCH_CONCURRENCY = int(os.getenv("BENCH_CONCURRENCY", os.getenv("PROBE_CONCURRENCY", "8")))
+# Fixed server-side delay; per-probe overhead is whatever the client adds on top.
+BENCH_MOCK_LATENCY_MS = float(os.getenv("BENCH_MOCK_LATENCY_MS", "20"))
+BENCH_MOCK_PORT = int(os.getenv("BENCH_MOCK_PORT", "8909"))
+# Never the monitoring database: benchmark rows would show up as real checks.
+# Unset means a SQLite file in the run's scratch directory.
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL")
+BENCH_OUTPUT = os.getenv("BENCH_OUTPUT")
+
+PROVIDERS = ("openai", "anthropic", "google")
+
+
+def benchmark_targets(count):
+    """`count` synthetic models spread across the three providers"""
+    return [
+        {
+            "provider": PROVIDERS[i % len(PROVIDERS)],
+            "model": f"mock-{PROVIDERS[i % len(PROVIDERS)]}-{i // len(PROVIDERS)}",
+            "label": f"Mock model {i}",
+        }
+        for i in range(count)
+    ]
+
+
+def percentiles(values):
+    if not values:
+        return {"p50": None, "p95": None, "max": None}
+    ordered = sorted(values)
+
+    def at(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+    return {"p50": at(0.50), "p95": at(0.95), "max": round(ordered[-1], 3)}
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_size(count):
+    """Benchmark one target count in this process and return its metrics"""
+    # Imported here: monitor_and_save opens the database at import, and only
+    # the child processes point DATABASE_URL at the benchmark database.
+    from database import init_db
+    from monitor_and_save import check_sink, save_result
+    from probe_engine import preload_sdks, probe_matrix, run_probes
+
+    init_db()
+    # One-off import cost, not per-probe overhead.
+    preload_sdks(PROVIDERS)
+
+    probes = probe_matrix(targets=benchmark_targets(count), modes=BENCH_MODES, warm_calls=0)
+    save_ms = []
+
+    def timed_save(result):
+        start = time.perf_counter()
+        save_result(result)
+        save_ms.append((time.perf_counter() - start) * 1000)
+
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    results = run_probes(probes, concurrency=BENCH_CONCURRENCY, on_result=timed_save, run_timeout=600)
+    check_sink.flush()
+    wall_s = time.perf_counter() - start
+
+    latencies = [r['latency'] for r in results if r['success']]
+    return {
+        "targets": count,
+        "probes": len(probes),
+        "successful": len(latencies),
+        "failed": len(results) - len(latencies),
+        "wall_s": round(wall_s, 3),
+        "probes_per_s": round(len(results) / wall_s, 1),
+        "probe_latency_ms": percentiles(latencies),
+        "overhead_ms": percentiles([l - BENCH_MOCK_LATENCY_MS for l in latencies]),
+        # Time on_result spends per check, and per batched database write.
+        "save_ms": percentiles(save_ms),
+        "db_write_ms": percentiles(list(check_sink.flush_ms)),
+        "db_flushes": check_sink.flushes,
+        "rss_before_mb": rss_before,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def wait_for_port(port, timeout_s=10):
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"mock provider did not start on port {port}")
+
+
+def main():
+    # Scratch directory for the database and the check spool, removed afterwards.
+    # With the default ./check_spool.db, a failed flush would spool mock checks
+    # that the next monitor run replays into the real database.
+    scratch = Path(tempfile.mkdtemp(prefix="probe_benchmark-"))
+    try:
+        benchmark(scratch)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def benchmark(scratch):
+    here = Path(__file__).resolve().parent
+    database_url = BENCH_DATABASE_URL or f"sqlite:///{scratch / 'probe_benchmark.db'}"
+    mock_url = f"http://127.0.0.1:{BENCH_MOCK_PORT}"
+    env = {
+        **os.environ,
+        "MOCK_PORT": str(BENCH_MOCK_PORT),
+        "MOCK_LATENCY": f"fixed:{BENCH_MOCK_LATENCY_MS}",
+        "MOCK_ERRORS": "",
+        "OPENAI_BASE_URL": f"{mock_url}/v1",
+        "ANTHROPIC_BASE_URL": mock_url,
+        "GOOGLE_BASE_URL": mock_url,
+        "OPENAI_API_KEY": "mock",
+        "ANTHROPIC_API_KEY": "mock",
+        "GOOGLE_API_KEY": "mock",
+        "NO_PROXY": "127.0.0.1",
+        "MONITOR_TYPE": "main",
+        "DATABASE_URL": database_url,
+        "CHECK_SPOOL_PATH": str(scratch / "check_spool.db"),
+    }
+
+    if database_url.startswith("sqlite:///"):
+        Path(database_url[len("sqlite:///"):]).unlink(missing_ok=True)
+
+    print("\n" + "="*84)
+    print("AI API MONITOR - Probe Engine Benchmark")
+    print("="*84)
+    print(f"Sizes: {BENCH_SIZES}  Modes: {BENCH_MODES}  Concurrency: {BENCH_CONCURRENCY}  "
+          f"Mock latency: {BENCH_MOCK_LATENCY_MS:.0f}ms")
+    print()
+    print(f"{'Targets':>7s} {'Probes':>7s} {'Failed':>7s} {'Probes/s':>9s} {'Overhead p50':>13s} "
+          f"{'p95':>8s} {'DB write p50':>13s} {'p95':>8s} {'Peak RSS':>10s}")
+    print("-"*84)
+
+    mock = subprocess.Popen(
+        [sys.executable, str(here / "mock_provider.py")],
+        env=env, stdout=subprocess.DEVNULL
+    )
+    runs = []
+    try:
+        wait_for_port(BENCH_MOCK_PORT)
+        for count in BENCH_SIZES:
+            # Child stdout carries the per-check prints; the metrics come back last.
+            child = subprocess.run(
+                [sys.executable, str(here / "probe_benchmark.py"), "--size", str(count)],
+                env=env, capture_output=True, text=True
+            )
+            if child.returncode != 0:
+                print(f"{count:7d}  ❌ benchmark process failed:\n{child.stderr.strip()}")
+                continue
+            run = json.loads(child.stdout.strip().splitlines()[-1])
+            runs.append(run)
+            print(f"{run['targets']:7d} {run['probes']:7d} {run['failed']:7d} {run['probes_per_s']:9.1f} "
+                  f"{run['overhead_ms']['p50'] or 0:11.1f}ms {run['overhead_ms']['p95'] or 0:6.1f}ms "
+                  f"{run['db_write_ms']['p50'] or 0:11.1f}ms {run['db_write_ms']['p95'] or 0:6.1f}ms "
+                  f"{run['peak_rss_mb'] or 0:8.1f}MB")
+    finally:
+        mock.terminate()
+        mock.wait()
+
+    commit = git_commit()
+    report = {
+        "benchmark": "probe_engine",
+        "commit": commit,
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "database": database_url.split("://", 1)[0],
+        "config": {
+            "modes": BENCH_MODES,
+            "concurrency": BENCH_CONCURRENCY,
+            "mock_latency_ms": BENCH_MOCK_LATENCY_MS,
+        },
+        "runs": runs,
+    }
+    output = Path(BENCH_OUTPUT or here / "reports" / "benchmarks" / f"probe-engine-{commit}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print()
+    print(f"📄 Results written to {output}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--size":
+        print(json.dumps(run_size(int(sys.argv[2]))))
+    else:
+        main()
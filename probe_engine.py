@@ -0,0 +1,467 @@
+# probe_engine.py
+import asyncio
+import importlib
+import os
+import time
+import uuid
+from datetime import datetime
+
+# Provider SDKs are imported by their client factories, so a run only pays
+# for the SDKs of the providers it actually probes.
+from failures import classify_exception
+from phase_timing import start_timer, timed_http_client
+
+MAX_SUCCESS_LATENCY_MS = float(os.getenv("MAX_SUCCESS_LATENCY_MS", "30000"))
+PROBE_CONCURRENCY = int(os.getenv("PROBE_CONCURRENCY", "8"))
+# A probe is cancelled once it can no longer pass the SLA check.
+PROBE_TIMEOUT_S = float(os.getenv("PROBE_TIMEOUT_S", str(MAX_SUCCESS_LATENCY_MS / 1000)))
+# Hard ceiling for a whole run, well below the Actions job timeout.
+RUN_TIMEOUT_S = float(os.getenv("RUN_TIMEOUT_S", "120"))
+
+# Every provider/model pair probed on each run.
+PROBES = [
+    {"provider": "google", "model": "gemini-2.5-flash", "label": "Google Gemini 2.5 Flash"},
+    {"provider": "anthropic", "model": "claude-opus-4-6", "label": "Anthropic Claude Opus 4.6"},
+    {"provider": "openai", "model": "gpt-4.1-mini", "label": "ChatGPT 4.1 mini"},
+]
+
+DEFAULT_PROMPT = "Say 'OK'"
+
+# "completion" waits for the full response, "stream" measures time to first token.
+# "benchmark" probes stream a sized payload (see payload_benchmark.py).
+PROBE_MODES = [m.strip() for m in os.getenv("PROBE_MODES", "completion,stream").split(",") if m.strip()]
+
+
+# API key each provider needs. Providers without a key, or left out of
+# ENABLED_PROVIDERS, are not probed and their SDK is never imported.
+PROVIDER_KEYS = {
+    "google": "GOOGLE_API_KEY",
+    "anthropic": "ANTHROPIC_API_KEY",
+    "openai": "OPENAI_API_KEY",
+}
+ENABLED_PROVIDERS = [
+    p.strip() for p in os.getenv("ENABLED_PROVIDERS", ",".join(PROVIDER_KEYS)).split(",") if p.strip()
+]
+
+
+def provider_enabled(provider):
+    return provider in ENABLED_PROVIDERS and bool(os.getenv(PROVIDER_KEYS.get(provider, ""), ""))
+
+
+def enabled_targets(targets=None):
+    """PROBES minus disabled providers and providers without an API key"""
+    targets = PROBES if targets is None else targets
+    return [t for t in targets if provider_enabled(t["provider"])]
+
+
+# With WARM_CALLS > 0 every probe is a cold call on a fresh client followed by
+# that many warm calls reusing its pooled connection.
+WARM_CALLS = int(os.getenv("WARM_CALLS", "0"))
+
+
+def probe_matrix(targets=None, modes=None, warm_calls=None):
+    """Expand provider/model targets into one probe per mode"""
+    targets = enabled_targets() if targets is None else targets
+    modes = PROBE_MODES if modes is None else modes
+    warm_calls = WARM_CALLS if warm_calls is None else warm_calls
+    return [
+        {**target, "mode": mode, "warm_calls": warm_calls}
+        for mode in modes
+        for target in targets
+    ]
+
+
+def classify_result(latency_ms, response_text, max_latency_ms=None):
+    """Only count a check as success if it returned useful output within SLA."""
+    max_latency_ms = MAX_SUCCESS_LATENCY_MS if max_latency_ms is None else max_latency_ms
+    if not response_text or not response_text.strip():
+        return False, "empty response"
+    if latency_ms > max_latency_ms:
+        return False, f"latency exceeded threshold ({latency_ms:.0f}ms > {max_latency_ms:.0f}ms)"
+    return True, None
+
+
+# Base URL overrides, e.g. to point every provider at mock_provider.py.
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")
+ANTHROPIC_BASE_URL = os.getenv("ANTHROPIC_BASE_URL")
+GOOGLE_BASE_URL = os.getenv("GOOGLE_BASE_URL")
+
+
+# SDK module each client factory imports on first use.
+PROVIDER_SDKS = {
+    "google": "google.genai",
+    "anthropic": "anthropic",
+    "openai": "openai",
+}
+
+
+def preload_sdks(providers=None):
+    """Import provider SDKs up front, e.g. so a benchmark doesn't time them"""
+    for provider in PROVIDER_SDKS if providers is None else providers:
+        importlib.import_module(PROVIDER_SDKS[provider])
+
+
+# Each factory returns (sdk_client, http_client). The httpx client is kept so
+# the run can close it: genai never closes a client it was handed. SDK
+# retries are off: a retried 429 or 5xx would be recorded as a slow success,
+# without its failure category, HTTP status or Retry-After.
+
+def make_openai_client(timeout):
+    import openai
+
+    http_client = timed_http_client(openai.DefaultAsyncHttpxClient)
+    client = openai.AsyncOpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        base_url=OPENAI_BASE_URL,
+        timeout=timeout,
+        max_retries=0,
+        http_client=http_client
+    )
+    return client, http_client
+
+
+def make_anthropic_client(timeout):
+    import anthropic
+
+    http_client = timed_http_client(anthropic.DefaultAsyncHttpxClient)
+    client = anthropic.AsyncAnthropic(
+        api_key=os.getenv("ANTHROPIC_API_KEY"),
+        base_url=ANTHROPIC_BASE_URL,
+        timeout=timeout,
+        max_retries=0,
+        http_client=http_client
+    )
+    return client, http_client
+
+
+def make_google_client(timeout):
+    from google import genai
+
+    http_client = timed_http_client()
+    client = genai.Client(
+        api_key=os.getenv("GOOGLE_API_KEY"),
+        http_options={
+            "timeout": int(timeout * 1000),
+            "retry_options": {"attempts": 1},
+            "httpx_async_client": http_client,
+            **({"base_url": GOOGLE_BASE_URL} if GOOGLE_BASE_URL else {})
+        }
+    ).aio
+    return client, http_client
+
+
+CLIENT_FACTORIES = {
+    "openai": make_openai_client,
+    "anthropic": make_anthropic_client,
+    "google": make_google_client,
+}
+
+
+def build_clients(timeout=PROBE_TIMEOUT_S, providers=None):
+    """Create one async SDK client per provider for a probe run
+
+    Returns (clients, http_clients); pass http_clients to close_clients().
+    """
+    providers = CLIENT_FACTORIES if providers is None else providers
+    clients = {}
+    http_clients = []
+    for provider in providers:
+        clients[provider], http_client = CLIENT_FACTORIES[provider](timeout)
+        http_clients.append(http_client)
+    return clients, http_clients
+
+
+async def close_clients(http_clients):
+    for http_client in http_clients:
+        try:
+            await http_client.aclose()
+        except Exception:
+            pass
+
+
+def token_usage(prompt_tokens, completion_tokens):
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
+
+
+def google_config(max_tokens):
+    if not max_tokens:
+        return None
+    # Without a thinking budget of 0, Gemini 2.5 can spend the whole output
+    # budget on hidden reasoning and return no text.
+    return {"max_output_tokens": max_tokens, "thinking_config": {"thinking_budget": 0}}
+
+
+# Each call takes (client, model, prompt, max_tokens) and returns
+# (response_text, usage). max_tokens=None keeps the provider default.
+
+async def call_openai(client, model, prompt=DEFAULT_PROMPT, max_tokens=None):
+    extra = {"max_tokens": max_tokens} if max_tokens else {}
+    response = await client.chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        **extra
+    )
+    usage = {}
+    if response.usage:
+        usage = token_usage(response.usage.prompt_tokens, response.usage.completion_tokens)
+    return response.choices[0].message.content or "", usage
+
+
+async def call_anthropic(client, model, prompt=DEFAULT_PROMPT, max_tokens=None):
+    response = await client.messages.create(
+        model=model,
+        max_tokens=max_tokens or 5,
+        messages=[{"role": "user", "content": prompt}]
+    )
+    response_text = " ".join(
+        block.text for block in response.content if hasattr(block, "text") and block.text
+    )
+    return response_text, token_usage(response.usage.input_tokens, response.usage.output_tokens)
+
+
+async def call_google(client, model, prompt=DEFAULT_PROMPT, max_tokens=None):
+    response = await client.models.generate_content(
+        model=model,
+        contents=prompt,
+        config=google_config(max_tokens)
+    )
+    usage = {}
+    metadata = getattr(response, "usage_metadata", None)
+    if metadata:
+        usage = token_usage(metadata.prompt_token_count, metadata.candidates_token_count)
+    return getattr(response, "text", None) or "", usage
+
+
+# Streaming variants yield text pieces as they arrive and fill `usage`
+# once the provider reports token counts.
+
+async def stream_openai(client, model, usage, prompt=DEFAULT_PROMPT, max_tokens=None):
+    extra = {"max_tokens": max_tokens} if max_tokens else {}
+    stream = await client.chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        stream=True,
+        stream_options={"include_usage": True},
+        **extra
+    )
+    async for chunk in stream:
+        if chunk.usage:
+            usage.update(token_usage(chunk.usage.prompt_tokens, chunk.usage.completion_tokens))
+        if chunk.choices:
+            yield chunk.choices[0].delta.content or ""
+
+
+async def stream_anthropic(client, model, usage, prompt=DEFAULT_PROMPT, max_tokens=None):
+    async with client.messages.stream(
+        model=model,
+        max_tokens=max_tokens or 5,
+        messages=[{"role": "user", "content": prompt}]
+    ) as stream:
+        async for text in stream.text_stream:
+            yield text
+        message = await stream.get_final_message()
+        usage.update(token_usage(message.usage.input_tokens, message.usage.output_tokens))
+
+
+async def stream_google(client, model, usage, prompt=DEFAULT_PROMPT, max_tokens=None):
+    stream = await client.models.generate_content_stream(
+        model=model,
+        contents=prompt,
+        config=google_config(max_tokens)
+    )
+    async for chunk in stream:
+        metadata = getattr(chunk, "usage_metadata", None)
+        if metadata and metadata.candidates_token_count is not None:
+            usage.update(token_usage(metadata.prompt_token_count, metadata.candidates_token_count))
+        yield getattr(chunk, "text", None) or ""
+
+
+PROVIDER_CALLS = {
+    "openai": call_openai,
+    "anthropic": call_anthropic,
+    "google": call_google,
+}
+
+PROVIDER_STREAMS = {
+    "openai": stream_openai,
+    "anthropic": stream_anthropic,
+    "google": stream_google,
+}
+
+
+async def consume_stream(stream, start, usage):
+    """Read a token stream, returning the text and stream timing metrics"""
+    pieces = []
+    arrivals = []
+    async for text in stream:
+        if not text:
+            continue
+        arrivals.append(time.perf_counter())
+        pieces.append(text)
+    end = time.perf_counter()
+
+    metrics = {"ttft_ms": None, "inter_token_ms": None, "decode_tokens_per_s": None}
+    if arrivals:
+        metrics["ttft_ms"] = (arrivals[0] - start) * 1000
+    if len(arrivals) > 1:
+        metrics["inter_token_ms"] = (arrivals[-1] - arrivals[0]) * 1000 / (len(arrivals) - 1)
+    # Decode rate: tokens after the first one over the time after the first one.
+    completion_tokens = usage.get("completion_tokens")
+    if arrivals and completion_tokens and completion_tokens > 1 and end > arrivals[0]:
+        metrics["decode_tokens_per_s"] = (completion_tokens - 1) / (end - arrivals[0])
+    return "".join(pieces), metrics
+
+
+def connection_state(phases):
+    """'cold' if the probe had to open a connection, 'warm' if it reused one"""
+    if phases["connect_ms"] is not None or phases["tls_ms"] is not None:
+        return "cold"
+    if phases["ttfb_ms"] is not None:
+        return "warm"
+    # Never got as far as sending a request.
+    return None
+
+
+def make_result(probe, run_started_at, latency, success, error, **fields):
+    """Build a result dict; `fields` are extra ApiCheck column values
+
+    Every result gets its own probe_run_id, the key that makes saving it
+    idempotent.
+    """
+    return {
+        'provider': probe["provider"],
+        'model': probe["model"],
+        'timestamp': run_started_at,
+        'latency': latency if success else None,
+        'success': success,
+        'error': error,
+        'fields': {'probe_mode': probe.get("mode", "completion"), 'probe_run_id': uuid.uuid4().hex, **fields},
+    }
+
+
+async def run_probe(probe, clients, semaphore, run_started_at, timeout=PROBE_TIMEOUT_S):
+    """Run a single probe and classify its outcome
+
+    Probes may override the prompt, max_tokens and timeout (in seconds);
+    a probe-level timeout also replaces the SLA threshold.
+    """
+    provider = probe["provider"]
+    model = probe["model"]
+    request = {"prompt": probe.get("prompt", DEFAULT_PROMPT), "max_tokens": probe.get("max_tokens")}
+    timeout = probe.get("timeout", timeout)
+    max_latency_ms = probe["timeout"] * 1000 if "timeout" in probe else None
+    usage = {}
+    stream_metrics = {}
+    failure = {}
+    async with semaphore:
+        timer = start_timer()
+        start = time.perf_counter()
+        try:
+            if probe.get("mode") in ("stream", "benchmark"):
+                stream = PROVIDER_STREAMS[provider](clients[provider], model, usage, **request)
+                call = consume_stream(stream, start, usage)
+                response_text, stream_metrics = await asyncio.wait_for(call, timeout=timeout)
+            else:
+                call = PROVIDER_CALLS[provider](clients[provider], model, **request)
+                response_text, usage = await asyncio.wait_for(call, timeout=timeout)
+            latency = (time.perf_counter() - start) * 1000
+            is_success, error = classify_result(latency, response_text, max_latency_ms)
+            if not is_success:
+                empty = not response_text or not response_text.strip()
+                failure = {"failure_category": "empty_response" if empty else "sla_exceeded"}
+        except asyncio.TimeoutError:
+            latency = None
+            is_success, error = False, f"timeout: no response within {timeout * 1000:.0f}ms"
+            failure = {"failure_category": "timeout"}
+        except Exception as e:
+            latency = None
+            # The class name feeds the error signature (error_signatures.py).
+            is_success, error = False, f"{type(e).__name__}: {e}"
+            failure = classify_exception(e)
+        if not is_success:
+            # How long the probe took to fail, whatever the kind of failure.
+            failure["failure_latency_ms"] = (time.perf_counter() - start) * 1000
+
+    phases = timer.as_ms()
+    return make_result(
+        probe, run_started_at, latency, is_success, error,
+        connection_state=connection_state(phases), **phases, **stream_metrics, **usage,
+        **failure
+    )
+
+
+async def run_probes_async(probes=None, concurrency=PROBE_CONCURRENCY, on_result=None,
+                           run_timeout=RUN_TIMEOUT_S, client_timeout=PROBE_TIMEOUT_S):
+    """Fire every probe at once, at most `concurrency` in flight.
+
+    `on_result` is called as soon as each probe finishes (a plain function
+    runs in a worker thread, a coroutine function on the loop), so earlier
+    results are persisted even if later probes hang. Probes still
+    running at the run deadline are cancelled and reported as timeouts.
+
+    A probe with "warm_calls": n gets a fresh client of its own: one cold
+    call that opens the connection, then n calls over the kept-alive pool.
+    """
+    probes = probe_matrix() if probes is None else probes
+    clients, http_clients = build_clients(
+        client_timeout, {p["provider"] for p in probes if not p.get("warm_calls")}
+    )
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    run_started_at = datetime.utcnow()
+    results = [[] for _ in probes]
+    # perf_counter() at the start of each probe's current call, for cut-off ones
+    attempt_started = {}
+
+    async def deliver(index, result):
+        results[index].append(result)
+        if on_result is None:
+            return
+        if asyncio.iscoroutinefunction(on_result):
+            await on_result(result)
+        else:
+            await asyncio.to_thread(on_result, result)
+
+    async def run_one(index, probe):
+        probe_clients = clients
+        warm_calls = probe.get("warm_calls", 0)
+        if warm_calls:
+            provider = probe["provider"]
+            client, http_client = CLIENT_FACTORIES[provider](client_timeout)
+            http_clients.append(http_client)
+            probe_clients = {provider: client}
+        for _ in range(1 + warm_calls):
+            attempt_started[index] = time.perf_counter()
+            result = await run_probe(probe, probe_clients, semaphore, run_started_at)
+            await deliver(index, result)
+
+    tasks = {
+        asyncio.create_task(run_one(index, probe)): index
+        for index, probe in enumerate(probes)
+    }
+    start = time.perf_counter()
+    try:
+        done, pending = await asyncio.wait(tasks, timeout=run_timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in pending:
+            index = tasks[task]
+            error = f"timeout: run deadline of {run_timeout:.0f}s reached"
+            # Includes any wait for a concurrency slot: the probe got no answer in that time.
+            failure_latency_ms = (time.perf_counter() - attempt_started.get(index, start)) * 1000
+            await deliver(index, make_result(
+                probes[index], run_started_at, None, False, error,
+                failure_category="timeout", failure_latency_ms=failure_latency_ms
+            ))
+    finally:
+        await close_clients(http_clients)
+
+    return [result for group in results for result in group]
+
+
+def run_probes(probes=None, concurrency=PROBE_CONCURRENCY, on_result=None,
+               run_timeout=RUN_TIMEOUT_S, client_timeout=PROBE_TIMEOUT_S):
+    """Blocking entry point for scripts and the scheduler"""
+    return asyncio.run(
+        run_probes_async(probes, concurrency, on_result, run_timeout, client_timeout)
+    )
@@ -3,39 +3,27 @@ from html import escape
 import os
 from pathlib import Path
 
-from sqlalchemy import Integer, func
-
-from database import ApiCheck, SessionLocal
+from database import SessionLocal
+from rollups import query_rollups
 
 
 def query_stats(db, start: datetime, end: datetime):
-    rows = (
-        db.query(
-            ApiCheck.provider,
-            func.count(ApiCheck.id).label("total"),
-            func.sum(func.cast(ApiCheck.success, Integer)).label("successful"),
-            func.avg(ApiCheck.latency_ms).label("avg_latency"),
-            func.min(ApiCheck.latency_ms).label("min_latency"),
-            func.max(ApiCheck.latency_ms).label("max_latency"),
-        )
-        .filter(ApiCheck.timestamp >= start, ApiCheck.timestamp < end)
-        .group_by(ApiCheck.provider)
-        .order_by(ApiCheck.provider)
-        .all()
-    )
-
     data = {}
-    for r in rows:
-        total = int(r.total or 0)
-        successful = int(r.successful or 0)
-        uptime = (successful / total * 100.0) if total else 0.0
-        data[r.provider] = {
-            "total": total,
-            "successful": successful,
-            "uptime": uptime,
-            "avg_latency": float(r.avg_latency) if r.avg_latency is not None else None,
-            "min_latency": float(r.min_latency) if r.min_latency is not None else None,
-            "max_latency": float(r.max_latency) if r.max_latency is not None else None,
+    # Hourly rollups that start inside the window.
+    for s in query_rollups(db, start, end):
+        data[s["provider"]] = {
+            "total": s["total"],
+            "successful": s["successful"],
+            "covered_s": s["covered_s"],
+            "healthy_s": s["healthy_s"],
+            "uptime": s["uptime"],
+            "avg_latency": s["avg_latency"],
+            "min_latency": s["min_latency"],
+            "max_latency": s["max_latency"],
+            "p50_latency": s["p50_latency"],
+            "p95_latency": s["p95_latency"],
+            "p99_latency": s["p99_latency"],
+            "avg_ttft": s["avg_ttft"],
         }
     return data
 
@@ -110,6 +98,13 @@ def pick_biggest_regression(current, previous):
     return f"{worst_provider} ({reason_text})"
 
 
+def pick_fastest_first_token(current):
+    candidates = [(s["avg_ttft"], provider) for provider, s in current.items() if s["avg_ttft"] is not None]
+    if not candidates:
+        return None
+    return min(candidates)[1]
+
+
 def make_operational_recommendation(best_provider, biggest_regression):
     if not best_provider and not biggest_regression:
         return "Collect another full week of data before making routing changes."
@@ -137,10 +132,13 @@ def load_manual_notes():
 def build_report_html(now, start, end, current, previous, manual_notes, lane_label):
     total_checks = sum(s["total"] for s in current.values())
     total_success = sum(s["successful"] for s in current.values())
-    overall_uptime = (total_success / total_checks * 100.0) if total_checks else 0.0
+    covered_s = sum(s["covered_s"] for s in current.values())
+    healthy_s = sum(s["healthy_s"] for s in current.values())
+    overall_uptime = (healthy_s / covered_s * 100.0) if covered_s else 0.0
     best = pick_best_provider(current)
     biggest_regression = pick_biggest_regression(current, previous)
     recommendation = make_operational_recommendation(best, biggest_regression)
+    fastest_first_token = pick_fastest_first_token(current)
 
     rows_html = []
     providers = sorted(current.keys())
@@ -150,6 +148,7 @@ def build_report_html(now, start, end, current, previous, manual_notes, lane_lab
 
         uptime_trend = trend_symbol(c["uptime"], p.get("uptime"), lower_is_better=False)
         latency_trend = trend_symbol(c["avg_latency"], p.get("avg_latency"), lower_is_better=True)
+        ttft_trend = trend_symbol(c["avg_ttft"], p.get("avg_ttft"), lower_is_better=True)
 
         rows_html.append(
             "<tr>"
@@ -158,10 +157,15 @@ def build_report_html(now, start, end, current, previous, manual_notes, lane_lab
             f"<td>{c['successful']}</td>"
             f"<td>{fmt_pct(c['uptime'])}</td>"
             f"<td>{fmt_ms(c['avg_latency'])}</td>"
+            f"<td>{fmt_ms(c['p50_latency'])}</td>"
+            f"<td>{fmt_ms(c['p95_latency'])}</td>"
+            f"<td>{fmt_ms(c['p99_latency'])}</td>"
             f"<td>{fmt_ms(c['min_latency'])}</td>"
             f"<td>{fmt_ms(c['max_latency'])}</td>"
+            f"<td>{fmt_ms(c['avg_ttft'])}</td>"
             f"<td>{uptime_trend}</td>"
             f"<td>{latency_trend}</td>"
+            f"<td>{ttft_trend}</td>"
             "</tr>"
         )
 
@@ -213,6 +217,7 @@ def build_report_html(now, start, end, current, previous, manual_notes, lane_lab
         <ul>
             <li><strong>Best provider this week:</strong> {escape(best if best else 'N/A')}</li>
             <li><strong>Biggest regression:</strong> {escape(biggest_regression if biggest_regression else 'No material regression detected')}</li>
+            <li><strong>Fastest time to first token:</strong> {escape(fastest_first_token if fastest_first_token else 'N/A')}</li>
             <li><strong>Operational recommendation:</strong> {escape(recommendation)}</li>
         </ul>
     </section>
@@ -227,18 +232,23 @@ def build_report_html(now, start, end, current, previous, manual_notes, lane_lab
           <th>Success</th>
           <th>Uptime</th>
           <th>Avg Latency</th>
+          <th>P50</th>
+          <th>P95</th>
+          <th>P99</th>
           <th>Min</th>
           <th>Max</th>
+          <th>Avg TTFT</th>
           <th>Uptime Trend</th>
           <th>Latency Trend</th>
+          <th>TTFT Trend</th>
         </tr>
       </thead>
       <tbody>
-        {''.join(rows_html) if rows_html else '<tr><td colspan="9">No data for this week.</td></tr>'}
+        {''.join(rows_html) if rows_html else '<tr><td colspan="14">No data for this week.</td></tr>'}
       </tbody>
         <p class="meta">Lane: <strong>{escape(lane_label)}</strong></p>
     </table>
-    <p class=\"small\">Trend compares this week vs previous 7-day window. Uptime: higher is better. Latency: lower is better.</p>
+    <p class=\"small\">Trend compares this week vs previous 7-day window. Uptime: higher is better. Latency and TTFT (time to first token, from streaming probes): lower is better. P50/P95/P99 come from merged hourly latency sketches (within 1%). Uptime is time-weighted: each check counts for the time until the next one.</p>
   </section>
 
   {notes_html}
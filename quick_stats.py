@@ -1,25 +1,23 @@
 # quick_stats.py
-from database import SessionLocal, ApiCheck
-from sqlalchemy import func, Integer
+from database import SessionLocal
+from rollups import query_rollups
 from datetime import datetime, timedelta
 
+
+def ms(value):
+    """Latency column, or N/A when there is no sample (e.g. every check failed)"""
+    if value is None:
+        return "   N/A"
+    return f"{value:6.0f}ms"
+
+
 db = SessionLocal()
 
 # Get stats for last 24 hours
 cutoff = datetime.utcnow() - timedelta(hours=24)
 
-stats = db.query(
-    ApiCheck.provider,
-    func.count(ApiCheck.id).label('total'),
-    func.sum(func.cast(ApiCheck.success, Integer)).label('successful'),
-    func.avg(ApiCheck.latency_ms).label('avg_latency'),
-    func.min(ApiCheck.latency_ms).label('min_latency'),
-    func.max(ApiCheck.latency_ms).label('max_latency')
-).filter(
-    ApiCheck.timestamp >= cutoff
-).group_by(
-    ApiCheck.provider
-).all()
+# Read from the hourly rollups (see rollups.py).
+stats = query_rollups(db, cutoff)
 
 print("\n" + "="*70)
 print(f"📊 LAST 24 HOURS - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -27,12 +25,16 @@ print("="*70)
 print()
 
 for stat in stats:
-    uptime = (stat.successful / stat.total * 100) if stat.total > 0 else 0
-    
-    print(f"🔹 {stat.provider.upper()}")
-    print(f"   Uptime:      {uptime:5.1f}% ({stat.successful}/{stat.total} checks)")
-    print(f"   Avg Latency: {stat.avg_latency:6.0f}ms")
-    print(f"   Min/Max:     {stat.min_latency:6.0f}ms / {stat.max_latency:6.0f}ms")
+    uptime = stat['uptime']
+
+    print(f"🔹 {stat['provider'].upper()}")
+    print(f"   Uptime:      {uptime:5.1f}% ({stat['successful']}/{stat['total']} checks)")
+    if stat['avg_latency'] is None:
+        print("   Avg Latency:    N/A")
+    else:
+        print(f"   Avg Latency: {ms(stat['avg_latency'])}")
+        print(f"   P50/P95/P99: {ms(stat['p50_latency'])} / {ms(stat['p95_latency'])} / {ms(stat['p99_latency'])}")
+        print(f"   Min/Max:     {ms(stat['min_latency'])} / {ms(stat['max_latency'])}")
     print()
 
 db.close()
\ No newline at end of file
@@ -0,0 +1,138 @@
+# response_cache.py
+"""In-memory cache for the API's read endpoints.
+
+An entry is served until either the data version (data_version.py) moves
+on or its TTL runs out. CheckSink bumps the data version after every
+write, so a writer in the API's own process invalidates the cache
+immediately; the monitor normally writes from another process (the
+Actions job), and then API_CACHE_TTL_S bounds how stale a response can be. Concurrent misses on
+the same key share one computation, so a traffic spike on a cold cache
+still runs each query once.
+"""
+import asyncio
+import functools
+import inspect
+import os
+import time
+from collections import OrderedDict
+
+from fastapi import Request
+
+from data_version import data_version
+from http_cache import json_body
+
+API_CACHE_TTL_S = float(os.getenv("API_CACHE_TTL_S", "30"))
+API_CACHE_MAX_ENTRIES = int(os.getenv("API_CACHE_MAX_ENTRIES", "1024"))
+
+
+class ResponseCache:
+    """LRU of (data version, expiry, value) per key, with hit/miss counters"""
+
+    def __init__(self, ttl_s=API_CACHE_TTL_S, max_entries=API_CACHE_MAX_ENTRIES):
+        self.ttl_s = ttl_s
+        self.max_entries = max(1, max_entries)
+        self._entries = OrderedDict()
+        self._pending = {}
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.invalidated = 0
+        self.evictions = 0
+
+    def lookup(self, key):
+        """Cached value for key, or None when missing or stale"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        version, expires_at, value = entry
+        if version != data_version() or time.monotonic() >= expires_at:
+            del self._entries[key]
+            if version != data_version():
+                self.invalidated += 1
+            else:
+                self.expired += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def store(self, key, version, value):
+        self._entries[key] = (version, time.monotonic() + self.ttl_s, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_compute(self, key, compute):
+        """Return the cached value for key, or await compute() once for all waiters"""
+        entry = self.lookup(key)
+        if entry is not None:
+            self.hits += 1
+            return entry[2]
+        self.misses += 1
+        pending = self._pending.get(key)
+        if pending is None:
+            # Version taken before the query, so a write during it leaves the entry stale.
+            version = data_version()
+            pending = asyncio.ensure_future(compute())
+            self._pending[key] = pending
+            pending.add_done_callback(lambda task: self._finish(key, version, task))
+        # Shielded: one caller disconnecting doesn't cancel the query for the rest.
+        return await asyncio.shield(pending)
+
+    def _finish(self, key, version, task):
+        self._pending.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            self.store(key, version, task.result())
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "expired": self.expired,
+            "invalidated": self.invalidated,
+            "evictions": self.evictions,
+            "data_version": data_version(),
+            "ttl_s": self.ttl_s,
+        }
+
+
+response_cache = ResponseCache()
+
+
+def cached(validators=None, windowed=False):
+    """Serve an async route from the cache, keyed on the route and its arguments
+
+    The cached value is the route's JSON response, serialized and compressed
+    once (see http_cache.py), so a hit answers 304 or sends stored bytes.
+    validators is an optional coroutine function returning (version,
+    last_modified) of the underlying data, used for the ETag and the
+    Last-Modified header. windowed=True marks a route computed over a
+    window relative to now (the last 24 hours, ...), whose body changes
+    without any newer check; it then ignores If-Modified-Since.
+    """
+    def decorate(handler):
+        async def render(kwargs):
+            # Taken before the query: a write racing it can only make them older, never newer.
+            version, last_modified = await validators() if validators else (None, None)
+            return json_body(await handler(**kwargs), version, last_modified, windowed)
+
+        @functools.wraps(handler)
+        async def wrapper(request: Request, **kwargs):
+            key = (handler.__name__, tuple(sorted(kwargs.items())))
+            body = await response_cache.get_or_compute(key, lambda: render(kwargs))
+            return body.respond(request)
+
+        # FastAPI reads the parameters from the signature: the route's own plus the request.
+        signature = inspect.signature(handler)
+        wrapper.__signature__ = signature.replace(parameters=[
+            inspect.Parameter("request", inspect.Parameter.POSITIONAL_OR_KEYWORD, annotation=Request),
+            *signature.parameters.values(),
+        ])
+        return wrapper
+    return decorate
@@ -0,0 +1,239 @@
+# result_sink.py
+import atexit
+import io
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from sqlalchemy import DateTime
+from sqlalchemy.dialects import postgresql, sqlite
+
+from check_events import notify_checks
+from check_spool import CheckSpool
+from error_signatures import attach_signatures
+from data_version import bump_data_version
+from database import CHECK_CONFLICT_KEY, ApiCheck, engine
+from rollups import refresh_rollups
+
+# Flush once this many checks are buffered...
+CHECK_FLUSH_SIZE = int(os.getenv("CHECK_FLUSH_SIZE", "100"))
+# ...or once the oldest buffered check is this old.
+CHECK_FLUSH_INTERVAL_S = float(os.getenv("CHECK_FLUSH_INTERVAL_S", "5"))
+
+
+def column_defaults(table):
+    """Insert-time defaults per column; COPY bypasses SQLAlchemy, so rows carry them"""
+    defaults = {}
+    for column in table.columns:
+        if column is table.autoincrement_column or column.default is None:
+            continue
+        default = column.default
+        defaults[column.name] = (lambda d=default: d.arg(None)) if default.is_callable else (lambda d=default: d.arg)
+    return defaults
+
+
+def copy_value(value):
+    """Encode one value for COPY ... FROM STDIN in PostgreSQL text format"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+class CheckSink:
+    """Buffers ApiCheck rows and writes them in one multi-row insert
+
+    Rows are flushed when CHECK_FLUSH_SIZE are waiting, when the oldest is
+    CHECK_FLUSH_INTERVAL_S old, on flush()/close(), and at interpreter exit.
+    PostgreSQL gets a single COPY; other databases an executemany insert.
+    Error messages are stored as error signature ids (error_signatures.py).
+    If the write fails the rows go to a local CheckSpool, and the spool is
+    replayed after the next write that succeeds. Every write also rebuilds
+    the hourly/daily rollup buckets it touched, in the same transaction, so
+    no reader (the API's event streams in particular) sees the new checks
+    before their rollups.
+    """
+
+    def __init__(self, table=ApiCheck.__table__, flush_size=CHECK_FLUSH_SIZE,
+                 flush_interval_s=CHECK_FLUSH_INTERVAL_S):
+        self.table = table
+        # Everything but the serial id (timestamp is part of the key when partitioned).
+        self.columns = [c.name for c in table.columns if c is not table.autoincrement_column]
+        self.defaults = column_defaults(table)
+        self.spool = CheckSpool(
+            datetime_columns=[c.name for c in table.columns if isinstance(c.type, DateTime)]
+        )
+        self.flush_size = max(1, flush_size)
+        self.flush_interval_s = flush_interval_s
+        self._rows = []
+        self._oldest_at = None
+        self._lock = threading.Lock()
+        # Serializes writers so batches land in order, one at a time.
+        self._flush_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._timer = None
+        # Recent flush latencies (ms) and totals for reporting.
+        self.flush_ms = deque(maxlen=1000)
+        self.flushes = 0
+        self.rows_written = 0
+        self.rows_spooled = 0
+        self.rows_replayed = 0
+        self.rows_failed = 0
+        atexit.register(self.close)
+
+    def add(self, **values):
+        """Buffer one row; keys are column names"""
+        unknown = set(values) - set(self.columns)
+        if unknown:
+            raise TypeError(f"unknown {self.table.name} columns: {', '.join(sorted(unknown))}")
+        row = {}
+        for name in self.columns:
+            value = values.get(name)
+            if value is None and name in self.defaults:
+                value = self.defaults[name]()
+            row[name] = value
+
+        with self._lock:
+            self._rows.append(row)
+            if self._oldest_at is None:
+                self._oldest_at = time.monotonic()
+            # After close() nothing flushes on a timer, so write straight away.
+            full = len(self._rows) >= self.flush_size or self._closed.is_set()
+            if self._timer is None and not self._closed.is_set():
+                self._timer = threading.Thread(target=self._flush_when_due, name="check-sink", daemon=True)
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def _flush_when_due(self):
+        while not self._closed.wait(min(1.0, self.flush_interval_s)):
+            with self._lock:
+                due = self._oldest_at is not None and time.monotonic() - self._oldest_at >= self.flush_interval_s
+            if due:
+                self.flush()
+
+    def flush(self):
+        """Write every buffered row now; returns the number written"""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows, self._oldest_at = self._rows, [], None
+            if not rows:
+                return 0
+            start = time.perf_counter()
+            try:
+                self._attach_signatures(rows)
+                if engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2":
+                    self._copy(rows)
+                else:
+                    self._executemany(rows)
+            except Exception as e:
+                print(f"   ⚠️ Database error: {e}")
+                self._spool(rows)
+                return 0
+            self._announce()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.flush_ms.append(elapsed_ms)
+            self.flushes += 1
+            self.rows_written += len(rows)
+            print(f"   💾 Saved {len(rows)} check(s) to database in {elapsed_ms:.0f}ms")
+            self.replay_spool()
+            return len(rows)
+
+    def _refresh_rollups(self, conn, rows):
+        refresh_rollups([row["timestamp"] for row in rows], conn)
+
+    def _announce(self):
+        # Cached API responses in this process are stale now, and the API's
+        # event streams (check_events.py) can pick up the new rows.
+        bump_data_version()
+        try:
+            notify_checks()
+        except Exception as e:
+            # Streams still find the rows on their fallback poll.
+            print(f"   ⚠️ Check notification failed: {e}")
+
+    def _spool(self, rows):
+        try:
+            self.spool.append(rows)
+        except Exception as e:
+            self.rows_failed += len(rows)
+            print(f"   ❌ Could not spool {len(rows)} check(s), they are lost: {e}")
+            return
+        self.rows_spooled += len(rows)
+        print(f"   📥 Spooled {len(rows)} check(s) to {self.spool.path} for replay")
+
+    def replay_spool(self):
+        """Write spooled rows to the database; safe to call at any time"""
+        if not self.spool.pending():
+            return 0
+        try:
+            replayed = self.spool.replay(self._insert_ignoring_duplicates)
+        except Exception as e:
+            print(f"   ⚠️ Spool replay stopped, will retry: {e}")
+            return 0
+        self.rows_replayed += replayed
+        print(f"   ♻️ Replayed {replayed} spooled check(s)")
+        return replayed
+
+    def _attach_signatures(self, rows):
+        # Error text becomes a signature id; spooled rows keep whichever they have.
+        if "error_signature_id" in self.columns:
+            attach_signatures(rows)
+
+    def _insert_ignoring_duplicates(self, rows):
+        self._attach_signatures(rows)
+        dialects = {"postgresql": postgresql, "sqlite": sqlite}
+        insert = dialects[engine.dialect.name].insert(self.table).on_conflict_do_nothing(
+            index_elements=CHECK_CONFLICT_KEY
+        )
+        with engine.begin() as conn:
+            conn.execute(insert, rows)
+            self._refresh_rollups(conn, rows)
+        self._announce()
+
+    def _executemany(self, rows):
+        with engine.begin() as conn:
+            conn.execute(self.table.insert(), rows)
+            self._refresh_rollups(conn, rows)
+
+    def _copy(self, rows):
+        data = io.StringIO()
+        for row in rows:
+            data.write("\t".join(copy_value(row[name]) for name in self.columns))
+            data.write("\n")
+        data.seek(0)
+        with engine.begin() as conn:
+            # COPY on the DBAPI connection, inside the same transaction as the rollups.
+            cursor = conn.connection.cursor()
+            cursor.copy_expert(
+                f"COPY {self.table.name} ({', '.join(self.columns)}) FROM STDIN", data
+            )
+            self._refresh_rollups(conn, rows)
+
+    def close(self):
+        """Stop the flush timer and write whatever is left"""
+        self._closed.set()
+        self.flush()
+
+    def stats(self):
+        ordered = sorted(self.flush_ms)
+        return {
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "rows_spooled": self.rows_spooled,
+            "rows_replayed": self.rows_replayed,
+            "rows_failed": self.rows_failed,
+            "flush_ms_p50": ordered[len(ordered) // 2] if ordered else None,
+            "flush_ms_max": ordered[-1] if ordered else None,
+        }
@@ -0,0 +1,265 @@
+# retention.py
+"""Keeps the raw api_checks table small.
+
+On PostgreSQL api_checks is partitioned by month on timestamp: init_db()
+converts an existing table once and creates the partitions for this month
+and the next, and a default partition catches anything outside them
+until the next run gives those rows a partition of their own.
+`python retention.py` then drops raw months older than CHECK_RETENTION_DAYS
+and, on SQLite, moves old rows to an archive file and vacuums. Raw rows
+only go once the hourly and daily rollups account for every one of them,
+so reports and history keep working from the rollups alone. Hourly rollups
+are pruned after HOURLY_ROLLUP_RETENTION_DAYS; daily rollups are kept.
+"""
+import os
+import re
+import sqlite3
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, inspect, text
+
+from database import SessionLocal, ApiCheck, DailyRollup, HourlyRollup, PARTITIONED, as_datetime, engine, init_db
+from rollups import day_start, rebuild_rollups
+
+# Days of raw checks to keep; older data lives on in the rollups.
+CHECK_RETENTION_DAYS = int(os.getenv("CHECK_RETENTION_DAYS", "90"))
+# Days of hourly rollups to keep (never fewer than the raw checks).
+HOURLY_ROLLUP_RETENTION_DAYS = int(os.getenv("HOURLY_ROLLUP_RETENTION_DAYS", "365"))
+# SQLite only: where raw checks past retention are moved.
+CHECK_ARCHIVE_PATH = os.getenv("CHECK_ARCHIVE_PATH", "api_checks_archive.db")
+# Monthly partitions created ahead of the current month.
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "1"))
+
+TABLE = ApiCheck.__tablename__
+DEFAULT_PARTITION = f"{TABLE}_default"
+PARTITION_NAME = re.compile(rf"^{TABLE}_(\d{{4}})_(\d{{2}})$")
+
+
+def month_start(ts):
+    return ts.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(month):
+    if month.month == 12:
+        return month.replace(year=month.year + 1, month=1)
+    return month.replace(month=month.month + 1)
+
+
+def partition_name(month):
+    return f"{TABLE}_{month:%Y_%m}"
+
+
+def _partitions(conn):
+    """Month -> partition name for the monthly partitions of api_checks"""
+    names = conn.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = :table"
+    ), {"table": TABLE}).scalars()
+    partitions = {}
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions[datetime(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+
+def _create_partition(conn, month):
+    """Create the partition for `month`, moving its rows out of the default partition"""
+    end = next_month(month)
+    bounds = {"start": month, "end": end}
+    in_month = "timestamp >= :start AND timestamp < :end"
+    # Postgres refuses a new partition while the default one holds its rows.
+    stray = conn.execute(
+        text(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_month})"), bounds
+    ).scalar()
+    if stray:
+        conn.execute(text(
+            f"CREATE TEMP TABLE {TABLE}_moving AS SELECT * FROM {DEFAULT_PARTITION} WHERE {in_month}"
+        ), bounds)
+        conn.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_month}"), bounds)
+    conn.execute(text(
+        f"CREATE TABLE {partition_name(month)} PARTITION OF {TABLE} "
+        f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+    ))
+    if stray:
+        conn.execute(text(f"INSERT INTO {TABLE} SELECT * FROM {TABLE}_moving"))
+        conn.execute(text(f"DROP TABLE {TABLE}_moving"))
+    print(f"   ➕ Added partition {partition_name(month)}")
+
+
+def _ensure_partitions(conn, since, months_ahead):
+    month = month_start(since or datetime.utcnow())
+    last = month_start(datetime.utcnow())
+    for _ in range(months_ahead):
+        last = next_month(last)
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT"))
+    existing = _partitions(conn)
+    while month <= last:
+        if month not in existing:
+            _create_partition(conn, month)
+            existing[month] = partition_name(month)
+        month = next_month(month)
+    # Rows outside those months (clock skew, or a monitor that outran
+    # PARTITION_MONTHS_AHEAD) get their month's partition too, so
+    # drop_old_partitions() ages them out like any other month.
+    stray_months = conn.execute(text(
+        f"SELECT DISTINCT date_trunc('month', timestamp) FROM {DEFAULT_PARTITION}"
+    )).scalars().all()
+    for month in sorted(stray_months):
+        if month not in existing:
+            _create_partition(conn, month)
+
+
+def ensure_partitions(months_ahead=PARTITION_MONTHS_AHEAD, since=None):
+    """Create the default partition and monthly ones from `since` (default: now) ahead"""
+    if not PARTITIONED:
+        return
+    with engine.begin() as conn:
+        _ensure_partitions(conn, since, months_ahead)
+
+
+def partition_api_checks():
+    """Convert a plain PostgreSQL api_checks table into the partitioned layout
+
+    Runs in one transaction, so a failure leaves the old table untouched.
+    """
+    if not PARTITIONED:
+        return
+    with engine.begin() as conn:
+        kind = conn.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"), {"table": TABLE}).scalar()
+        if kind != "r":
+            return
+        print(f"   🗂️ Partitioning {TABLE} by month...")
+        columns = ", ".join(column.name for column in ApiCheck.__table__.columns)
+        conn.execute(text(f"CREATE TEMP TABLE {TABLE}_copy ON COMMIT DROP AS SELECT * FROM {TABLE}"))
+        oldest = conn.execute(text(f"SELECT min(timestamp) FROM {TABLE}_copy")).scalar()
+        conn.execute(text(f"DROP TABLE {TABLE}"))
+        ApiCheck.__table__.create(conn)
+        _ensure_partitions(conn, oldest, PARTITION_MONTHS_AHEAD)
+        conn.execute(text(f"INSERT INTO {TABLE} ({columns}) SELECT {columns} FROM {TABLE}_copy"))
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), coalesce(max(id), 0) + 1, false) FROM {TABLE}"
+        ))
+    print(f"   ✅ Partitioned {TABLE}")
+
+
+def _count(db, column, ts, start, end):
+    return int(db.query(func.coalesce(func.sum(column), 0)).filter(ts >= start, ts < end).scalar() or 0)
+
+
+def rolled_up(start, end):
+    """Whether the hourly and daily rollups count every raw check in [start, end)
+
+    start and end are whole UTC days.
+    """
+    db = SessionLocal()
+    try:
+        raw = db.query(func.count(ApiCheck.id)).filter(ApiCheck.timestamp >= start, ApiCheck.timestamp < end).scalar()
+        hourly = _count(db, HourlyRollup.checks, HourlyRollup.bucket_start, start, end)
+        daily = _count(db, DailyRollup.checks, DailyRollup.bucket_start, start, end)
+    finally:
+        db.close()
+    return raw == hourly == daily
+
+
+def ensure_rolled_up(start, end):
+    """Rebuild the rollups for [start, end) from raw checks unless they already match"""
+    if rolled_up(start, end):
+        return True
+    rebuild_rollups(start, end)
+    return rolled_up(start, end)
+
+
+def drop_old_partitions(cutoff):
+    """Drop monthly partitions that end on or before `cutoff`; returns their names"""
+    with engine.connect() as conn:
+        partitions = _partitions(conn)
+    dropped = []
+    for month, name in sorted(partitions.items()):
+        if next_month(month) > cutoff:
+            continue
+        if not ensure_rolled_up(month, next_month(month)):
+            print(f"   ⚠️ Keeping {name}: its rollups don't match the raw checks")
+            continue
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE {name}"))
+        dropped.append(name)
+        print(f"   🗑️ Dropped partition {name}")
+    return dropped
+
+
+def archive_old_checks(cutoff, archive_path=CHECK_ARCHIVE_PATH):
+    """SQLite: move checks older than `cutoff` to archive_path, then vacuum
+
+    Returns the number of rows moved.
+    """
+    db = SessionLocal()
+    try:
+        oldest = db.query(func.min(ApiCheck.timestamp)).scalar()
+    finally:
+        db.close()
+    oldest = as_datetime(oldest)
+    if oldest is None or oldest >= cutoff:
+        return 0
+    if not ensure_rolled_up(day_start(oldest), cutoff):
+        print(f"   ⚠️ Keeping checks before {cutoff:%Y-%m-%d}: their rollups don't match the raw checks")
+        return 0
+
+    columns = [column["name"] for column in inspect(engine).get_columns(TABLE)]
+    column_list = ", ".join(columns)
+    # Same text format SQLAlchemy stores DATETIME in, so the comparison is exact.
+    before = cutoff.strftime("%Y-%m-%d %H:%M:%S.%f")
+    conn = sqlite3.connect(engine.url.database, isolation_level=None)
+    try:
+        conn.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+        conn.execute(f"CREATE TABLE IF NOT EXISTS archive.{TABLE} AS SELECT * FROM main.{TABLE} WHERE 0")
+        archived = {row[1] for row in conn.execute(f"PRAGMA archive.table_info({TABLE})")}
+        for column in columns:
+            if column not in archived:
+                conn.execute(f"ALTER TABLE archive.{TABLE} ADD COLUMN {column}")
+        conn.execute("BEGIN")
+        conn.execute(
+            f"INSERT INTO archive.{TABLE} ({column_list}) "
+            f"SELECT {column_list} FROM main.{TABLE} WHERE timestamp < ?", (before,)
+        )
+        moved = conn.execute(f"DELETE FROM main.{TABLE} WHERE timestamp < ?", (before,)).rowcount
+        conn.execute("COMMIT")
+        conn.execute("DETACH DATABASE archive")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    print(f"   📦 Archived {moved} check(s) older than {cutoff:%Y-%m-%d} to {archive_path}")
+    return moved
+
+
+def prune_hourly_rollups(cutoff):
+    """Delete hourly rollups older than `cutoff`; the daily ones stay"""
+    db = SessionLocal()
+    try:
+        pruned = db.query(HourlyRollup).filter(HourlyRollup.bucket_start < cutoff).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+    if pruned:
+        print(f"   🧹 Pruned {pruned} hourly rollup(s) older than {cutoff:%Y-%m-%d}")
+    return pruned
+
+
+def apply_retention(retention_days=CHECK_RETENTION_DAYS, hourly_days=HOURLY_ROLLUP_RETENTION_DAYS):
+    """Drop or archive raw checks past retention, then prune hourly rollups"""
+    now = datetime.utcnow()
+    cutoff = day_start(now - timedelta(days=retention_days))
+    if PARTITIONED:
+        ensure_partitions()
+        drop_old_partitions(cutoff)
+    elif engine.dialect.name == "sqlite":
+        archive_old_checks(cutoff)
+    # Hourly buckets are rebuilt from raw checks, so they outlive them.
+    prune_hourly_rollups(day_start(now - timedelta(days=max(hourly_days, retention_days))))
+
+
+if __name__ == "__main__":
+    init_db()
+    apply_retention()
@@ -0,0 +1,252 @@
+# rollups.py
+"""Hourly and daily rollups of api_checks.
+
+A bucket is always rebuilt from its source rows (raw checks for an hour,
+hourly rollups for a day) rather than patched with deltas, so refreshing
+the same bucket twice, late rows and spool replays can never double-count.
+CheckSink refreshes the buckets it just wrote; `python rollups.py` is the
+compaction job that rebuilds a whole range.
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy import DateTime, case, delete, func, literal, select, update
+
+from latency_sketch import LatencySketch, merge_sketches
+from database import (
+    SessionLocal, ApiCheck, DailyRollup, HourlyRollup, as_datetime, engine, end_to_end_latency, handshake_ms,
+    sample_weight, weighted_success
+)
+from failures import FAILURE_CATEGORIES
+from phase_timing import PHASES
+
+# Hours re-aggregated by a plain `python rollups.py` run.
+ROLLUP_REFRESH_HOURS = int(os.getenv("ROLLUP_REFRESH_HOURS", "48"))
+
+# Rollup columns that are keys, or merged in Python rather than SQL.
+KEY_COLUMNS = ("id", "bucket_start", "provider", "model")
+SKETCH_COLUMNS = ("latency_sketch",)
+
+
+def hour_start(ts):
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def day_start(ts):
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _sum_count(name, expression):
+    return {f"{name}_sum": func.coalesce(func.sum(expression), 0), f"{name}_count": func.count(expression)}
+
+
+def hourly_aggregates():
+    """Rollup column -> aggregate over the raw api_checks rows of one bucket"""
+    cold = ApiCheck.connection_state == "cold"
+    warm = ApiCheck.connection_state == "warm"
+    aggregates = {
+        "checks": func.count(ApiCheck.id),
+        "successful": func.coalesce(func.sum(case((ApiCheck.success == True, 1), else_=0)), 0),
+        "burst_checks": func.coalesce(func.sum(case((ApiCheck.burst == True, 1), else_=0)), 0),
+        "covered_s": func.coalesce(func.sum(sample_weight), 0),
+        "healthy_s": func.coalesce(func.sum(weighted_success), 0),
+        **_sum_count("latency", end_to_end_latency),
+        "latency_min": func.min(end_to_end_latency),
+        "latency_max": func.max(end_to_end_latency),
+        **_sum_count("ttft", ApiCheck.ttft_ms),
+        **_sum_count("inter_token", ApiCheck.inter_token_ms),
+        **_sum_count("cold_latency", case((cold, end_to_end_latency))),
+        **_sum_count("warm_latency", case((warm, end_to_end_latency))),
+        **_sum_count("handshake", case((cold, handshake_ms))),
+    }
+    for phase in PHASES:
+        aggregates.update(_sum_count(phase, getattr(ApiCheck, phase)))
+    for category in FAILURE_CATEGORIES:
+        aggregates[f"{category}_failures"] = func.coalesce(
+            func.sum(case((ApiCheck.failure_category == category, 1), else_=0)), 0
+        )
+    return aggregates
+
+
+def merged_aggregates(table):
+    """Rollup column -> aggregate that merges several buckets of `table`"""
+    aggregates = {}
+    for column in table.__table__.columns:
+        if column.name in KEY_COLUMNS + SKETCH_COLUMNS:
+            continue
+        if column.name.endswith("_min"):
+            aggregates[column.name] = func.min(column)
+        elif column.name.endswith("_max"):
+            aggregates[column.name] = func.max(column)
+        else:
+            aggregates[column.name] = func.sum(column)
+    return aggregates
+
+
+def _rebuild_bucket(conn, target, source, start, end, aggregates):
+    """Replace target rows for [start, end) with aggregates of source rows"""
+    source_ts = source.timestamp if source is ApiCheck else source.bucket_start
+    conn.execute(delete(target).where(target.bucket_start == start))
+    names = list(aggregates)
+    query = (
+        select(
+            literal(start, DateTime).label("bucket_start"),
+            source.provider,
+            source.model,
+            *(aggregates[name].label(name) for name in names)
+        )
+        .where(source_ts >= start, source_ts < end)
+        .group_by(source.provider, source.model)
+    )
+    conn.execute(target.__table__.insert().from_select(["bucket_start", "provider", "model", *names], query))
+
+
+def _store_sketches(conn, target, start, source_rows):
+    """Sketch (provider, model, latency-or-sketch) rows onto target's bucket"""
+    sketches = {}
+    for provider, model, value in source_rows:
+        sketch = sketches.setdefault((provider, model), LatencySketch())
+        if isinstance(value, str):
+            sketch.merge(LatencySketch.from_json(value))
+        else:
+            sketch.add(value)
+    for (provider, model), sketch in sketches.items():
+        conn.execute(
+            update(target)
+            .where(target.bucket_start == start, target.provider == provider, target.model == model)
+            .values(latency_sketch=sketch.to_json())
+        )
+
+
+def refresh_rollups(timestamps, conn=None):
+    """Rebuild the hourly buckets holding `timestamps`, then their days
+
+    With `conn` the buckets are rebuilt in its transaction, e.g. the one
+    that inserted the checks; otherwise in a transaction of their own.
+    """
+    if conn is None:
+        with engine.begin() as conn:
+            return refresh_rollups(timestamps, conn)
+    hours = sorted({hour_start(ts) for ts in timestamps if ts is not None})
+    if not hours:
+        return 0
+    hourly, daily = hourly_aggregates(), merged_aggregates(HourlyRollup)
+    for hour in hours:
+        end = hour + timedelta(hours=1)
+        _rebuild_bucket(conn, HourlyRollup, ApiCheck, hour, end, hourly)
+        # Sketches need the individual latencies, but only this hour's.
+        latencies = conn.execute(
+            select(ApiCheck.provider, ApiCheck.model, end_to_end_latency)
+            .where(ApiCheck.timestamp >= hour, ApiCheck.timestamp < end, end_to_end_latency.isnot(None))
+        )
+        _store_sketches(conn, HourlyRollup, hour, latencies)
+    for day in sorted({day_start(hour) for hour in hours}):
+        end = day + timedelta(days=1)
+        _rebuild_bucket(conn, DailyRollup, HourlyRollup, day, end, daily)
+        hourly_sketches = conn.execute(
+            select(HourlyRollup.provider, HourlyRollup.model, HourlyRollup.latency_sketch)
+            .where(HourlyRollup.bucket_start >= day, HourlyRollup.bucket_start < end)
+        )
+        _store_sketches(conn, DailyRollup, day, hourly_sketches)
+    return len(hours)
+
+
+def rebuild_rollups(since=None, until=None):
+    """Rebuild every bucket from `since` (default: the oldest check) to `until` (default: now)"""
+    db = SessionLocal()
+    try:
+        oldest = db.query(func.min(ApiCheck.timestamp)).scalar()
+    finally:
+        db.close()
+    if oldest is None:
+        return 0
+    oldest = as_datetime(oldest)
+    hour = hour_start(max(oldest, since) if since else oldest)
+    until = until or datetime.utcnow()
+    hours = []
+    while hour < until:
+        hours.append(hour)
+        hour += timedelta(hours=1)
+    # One transaction per day keeps a full rebuild from holding one huge lock.
+    rebuilt = 0
+    for i in range(0, len(hours), 24):
+        rebuilt += refresh_rollups(hours[i:i + 24])
+    print(f"   🧮 Rebuilt {rebuilt} hourly rollup bucket(s)")
+    return rebuilt
+
+
+def _avg(row, name):
+    count = getattr(row, f"{name}_count")
+    return getattr(row, f"{name}_sum") / count if count else None
+
+
+def query_rollups(db, start, end=None, daily=False, provider=None, by_bucket=False):
+    """Merge the rollup buckets that start in [start, end) into per-provider stats
+
+    Uses hourly buckets unless daily=True. Adjacent windows never share a
+    bucket. by_bucket=True returns one entry per provider and bucket.
+
+    uptime is time-weighted (healthy_s / covered_s): each check counts for
+    the time until the next one, so extra burst samples taken during an
+    incident don't skew it.
+    """
+    table = DailyRollup if daily else HourlyRollup
+    merged = [aggregate.label(name) for name, aggregate in merged_aggregates(table).items()]
+    group = [table.provider, *([table.bucket_start] if by_bucket else [])]
+
+    def in_window(query):
+        query = query.filter(table.bucket_start >= start)
+        if end is not None:
+            query = query.filter(table.bucket_start < end)
+        if provider is not None:
+            query = query.filter(table.provider == provider)
+        return query
+
+    rows = in_window(db.query(*group, *merged)).group_by(*group).order_by(*group).all()
+
+    # Percentiles come from merging the buckets' sketches, never raw rows.
+    sketches = {}
+    for *key, data in in_window(db.query(*group, table.latency_sketch)).all():
+        sketches.setdefault(tuple(key), []).append(data)
+
+    results = []
+    for row in rows:
+        key = (row.provider, row.bucket_start) if by_bucket else (row.provider,)
+        percentiles = merge_sketches(sketches.get(key, [])).percentiles()
+        covered_s = float(row.covered_s or 0)
+        healthy_s = float(row.healthy_s or 0)
+        results.append({
+            "provider": row.provider,
+            "bucket_start": row.bucket_start if by_bucket else None,
+            "total": int(row.checks or 0),
+            "successful": int(row.successful or 0),
+            "burst_checks": int(row.burst_checks or 0),
+            "covered_s": covered_s,
+            "healthy_s": healthy_s,
+            "uptime": (healthy_s / covered_s * 100.0) if covered_s else 0.0,
+            "avg_latency": _avg(row, "latency"),
+            "min_latency": row.latency_min,
+            "max_latency": row.latency_max,
+            "p50_latency": percentiles["p50"],
+            "p95_latency": percentiles["p95"],
+            "p99_latency": percentiles["p99"],
+            "avg_ttft": _avg(row, "ttft"),
+            "avg_inter_token": _avg(row, "inter_token"),
+            "avg_cold_latency": _avg(row, "cold_latency"),
+            "avg_warm_latency": _avg(row, "warm_latency"),
+            "avg_handshake": _avg(row, "handshake"),
+            "avg_phases": {phase: _avg(row, phase) for phase in PHASES},
+            "failures": {category: int(getattr(row, f"{category}_failures") or 0) for category in FAILURE_CATEGORIES},
+        })
+    return results
+
+
+if __name__ == "__main__":
+    # python rollups.py          -> rebuild the last ROLLUP_REFRESH_HOURS hours
+    # python rollups.py --all    -> rebuild everything
+    from database import init_db
+
+    init_db()
+    since = None if sys.argv[1:] == ["--all"] else datetime.utcnow() - timedelta(hours=ROLLUP_REFRESH_HOURS)
+    rebuild_rollups(since)
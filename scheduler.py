@@ -1,17 +1,40 @@
-import schedule
+import asyncio
+import math
 import time
+import zlib
 from datetime import datetime
 import os
 from dotenv import load_dotenv
 
+# Before the project imports: they read their settings at import.
+load_dotenv()
+
 # Import your monitoring functions
-from google import genai
-import anthropic
-import openai
+from monitor_and_save import check_sink, save_result
+from probe_engine import probe_matrix, run_probes_async
+from timer_wheel import TimerWheel
 
-from database import SessionLocal, ApiCheck, init_db
+from database import init_db
 
-load_dotenv()
+# Probe intervals in seconds: "default" plus optional "provider" or
+# "provider/model" overrides, e.g. "default=3600,openai=300,google/gemini-2.5-flash=30"
+PROBE_INTERVALS = os.getenv("PROBE_INTERVALS", "default=3600")
+# Each probe is offset by a stable fraction of its interval so probes don't line up.
+PROBE_JITTER = float(os.getenv("PROBE_JITTER", "0.1"))
+# What to do when the loop wakes up after missing whole intervals:
+# "skip" runs once and realigns, "catch_up" runs each missed tick (up to CATCH_UP_LIMIT).
+MISSED_TICK_POLICY = os.getenv("MISSED_TICK_POLICY", "skip")
+CATCH_UP_LIMIT = int(os.getenv("CATCH_UP_LIMIT", "3"))
+SCHEDULER_TICK_S = float(os.getenv("SCHEDULER_TICK_S", "1"))
+
+# Adaptive burst probing: after a failure or a latency spike the probe runs
+# every BURST_INTERVAL_S until it has been healthy for BURST_RECOVERY_S.
+BURST_INTERVAL_S = float(os.getenv("BURST_INTERVAL_S", "30"))
+BURST_RECOVERY_S = float(os.getenv("BURST_RECOVERY_S", "600"))
+# A latency spike is a successful probe slower than this multiple of its
+# recent (exponentially weighted) baseline.
+LATENCY_SPIKE_FACTOR = float(os.getenv("LATENCY_SPIKE_FACTOR", "3"))
+BASELINE_ALPHA = 0.2
 
 # PRINT DATABASE INFO (for debugging)
 db_url = os.getenv("DATABASE_URL", "Not set")
@@ -22,153 +45,193 @@ elif db_url.startswith("sqlite"):
 else:
     print(f"❓ Unknown database: {db_url[:50]}")
 
-# Initialize database
-print("Initializing database...")
-init_db()
 
-# Configure APIs
-google_client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
-anthropic_client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-openai_client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+def parse_intervals(spec):
+    intervals = {}
+    for part in spec.split(","):
+        if "=" in part:
+            key, value = part.split("=", 1)
+            intervals[key.strip()] = float(value)
+    intervals.setdefault("default", 3600.0)
+    return intervals
 
-def monitor_google():
-    """Monitor Google Gemini"""
-    db = SessionLocal()
-    print(f"\n🔍 [{datetime.utcnow().strftime('%H:%M:%S')}] Testing Google Gemini...")
-    start = time.time()
-    
-    try:
-        response = google_client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents='Say "OK"'
-        )
-        latency = (time.time() - start) * 1000
-        
-        check = ApiCheck(
-            timestamp=datetime.utcnow(),
-            provider='google',
-            model='gemini-2.5-flash',
-            latency_ms=latency,
-            success=True
-        )
-        db.add(check)
-        db.commit()
-        
-        print(f"   ✅ {latency:.0f}ms - Saved to database (ID: {check.id})")
-        
-    except Exception as e:
-        check = ApiCheck(
-            timestamp=datetime.utcnow(),
-            provider='google',
-            model='gemini-2.5-flash',
-            latency_ms=0,
-            success=False,
-            error_message=str(e)
-        )
-        db.add(check)
-        db.commit()
-        print(f"   ❌ Failed: {e}")
-        
-    finally:
-        db.close()
 
-def monitor_anthropic():
-    """Monitor Anthropic Claude"""
-    db = SessionLocal()
-    print(f"🔍 [{datetime.utcnow().strftime('%H:%M:%S')}] Testing Anthropic Claude...")
-    start = time.time()
-    
-    try:
-        response = anthropic_client.messages.create(
-            model="claude-opus-4-6",
-            max_tokens=5,
-            messages=[{"role": "user", "content": "Say 'OK'"}]
-        )
-        latency = (time.time() - start) * 1000
-        
-        check = ApiCheck(
-            timestamp=datetime.utcnow(),
-            provider='anthropic',
-            model='claude-opus-4-6',
-            latency_ms=latency,
-            success=True
-        )
-        db.add(check)
-        db.commit()
-        
-        print(f"   ✅ {latency:.0f}ms - Saved to database (ID: {check.id})")
-        
-    except Exception as e:
-        check = ApiCheck(
-            timestamp=datetime.utcnow(),
-            provider='anthropic',
-            model='claude-opus-4-6',
-            latency_ms=0,
-            success=False,
-            error_message=str(e)
+def probe_key(probe):
+    return f"{probe['provider']}/{probe['model']}/{probe.get('mode', 'completion')}"
+
+
+def interval_for(probe, intervals):
+    """Most specific interval wins: provider/model, then provider, then default"""
+    for key in (f"{probe['provider']}/{probe['model']}", probe['provider'], "default"):
+        if key in intervals:
+            return intervals[key]
+
+
+def jitter_offset(probe, interval_s, jitter=PROBE_JITTER):
+    """Deterministic per-probe offset in [0, jitter * interval)"""
+    fraction = zlib.crc32(probe_key(probe).encode()) / 2**32
+    return fraction * jitter * interval_s
+
+
+class ProbeJob:
+    """One probe on a fixed grid: due times are anchor + k * interval.
+
+    While bursting the probe instead runs every BURST_INTERVAL_S from the
+    moment trouble was seen, and snaps back onto its grid after recovery.
+    """
+
+    def __init__(self, probe, interval_s, start):
+        self.probe = probe
+        self.interval_s = interval_s
+        self.anchor = start + jitter_offset(probe, interval_s)
+        self.next_due = self.anchor + interval_s
+        self.running = False
+        # Runs due but not started yet; catch-up runs go out one per tick.
+        self.pending_runs = 0
+        # Wall time up to next_due that no sample accounts for yet, and the
+        # share of it the running sample stands for.
+        self.unsampled_s = 0.0
+        self.sample_s = 0.0
+        self.bursting = False
+        self.healthy_since = None
+        self.baseline_ms = None
+
+    @property
+    def current_interval(self):
+        return min(BURST_INTERVAL_S, self.interval_s) if self.bursting else self.interval_s
+
+    def take_due(self, now, policy=MISSED_TICK_POLICY, catch_up_limit=CATCH_UP_LIMIT):
+        """Return how many runs are due now and move next_due along the grid"""
+        step = self.current_interval
+        missed = max(0, int((now - self.next_due) // step))
+        runs = 1 + min(missed, catch_up_limit) if policy == "catch_up" else 1
+        # Stepping from the previous due time (not from now) keeps the grid drift-free.
+        self.next_due += (missed + 1) * step
+        # Missed ticks are covered by the runs taken now, not dropped.
+        self.unsampled_s += (missed + 1) * step
+        return runs
+
+    def start_run(self):
+        """Claim a pending run; its sample stands for an equal share of the unsampled time"""
+        self.sample_s = self.unsampled_s / self.pending_runs
+        self.unsampled_s -= self.sample_s
+        self.pending_runs -= 1
+        self.running = True
+
+    def observe(self, result, now):
+        """Update burst state from a finished probe.
+
+        Returns the fields to store on the sample: whether it was a burst
+        sample and how many seconds of wall time it stands for.
+        """
+        was_bursting = self.bursting
+        previous_due = self.next_due
+        latency = result['latency']
+        spike = (
+            result['success']
+            and self.baseline_ms is not None
+            and latency > LATENCY_SPIKE_FACTOR * self.baseline_ms
         )
-        db.add(check)
-        db.commit()
-        print(f"   ❌ Failed: {e}")
-        
-    finally:
-        db.close()
 
-def monitor_openai():
-    """Monitor OpenAI"""
-    db = SessionLocal()
-    print(f"🔍 [{datetime.utcnow().strftime('%H:%M:%S')}] Testing OpenAI...")
-    start = time.time()
-    
+        if not result['success'] or spike:
+            self.healthy_since = None
+            if not self.bursting:
+                self.bursting = True
+                self.next_due = now + self.current_interval
+                print(f"   🔁 {probe_key(self.probe)}: {'latency spike' if spike else 'failure'}, "
+                      f"probing every {self.current_interval:g}s")
+        else:
+            if latency is not None:
+                self.baseline_ms = latency if self.baseline_ms is None else (
+                    BASELINE_ALPHA * latency + (1 - BASELINE_ALPHA) * self.baseline_ms
+                )
+            if self.bursting:
+                if self.healthy_since is None:
+                    self.healthy_since = now
+                elif now - self.healthy_since >= BURST_RECOVERY_S:
+                    self.bursting = False
+                    self.healthy_since = None
+                    ticks = math.ceil((now - self.anchor) / self.interval_s)
+                    self.next_due = self.anchor + ticks * self.interval_s
+                    print(f"   ✅ {probe_key(self.probe)}: healthy for {BURST_RECOVERY_S:g}s, "
+                          f"back to every {self.interval_s:g}s")
+
+        interval_s = self.sample_s
+        if self.next_due != previous_due:
+            # Rescheduled: the sample stands for the time until the new due
+            # time, including any catch-up runs that no longer happen.
+            interval_s += self.unsampled_s + self.next_due - previous_due
+            self.unsampled_s = 0.0
+            self.pending_runs = 0
+        return {'burst': was_bursting, 'interval_s': max(0.0, interval_s)}
+
+
+async def run_batch(wheel, jobs):
+    probes = [job.probe for job in jobs]
+    print(f"\n⏰ [{datetime.utcnow().strftime('%H:%M:%S')}] Running {len(probes)} due probe(s)")
+    jobs_by_key = {probe_key(job.probe): job for job in jobs}
+
+    async def on_result(result):
+        job = jobs_by_key[probe_key({**result, 'mode': result['fields']['probe_mode']})]
+        previous_due = job.next_due
+        result['fields'].update(job.observe(result, time.monotonic()))
+        if job.next_due != previous_due:
+            wheel.schedule(job.next_due, job)
+        await asyncio.to_thread(save_result, result)
+
     try:
-        response = openai_client.chat.completions.create(
-            model="gpt-4.1-mini",
-            messages=[{"role": "user", "content": "Say 'OK'"}],
-            max_tokens=5
-        )
-        latency = (time.time() - start) * 1000
-        
-        check = ApiCheck(
-            timestamp=datetime.utcnow(),
-            provider='openai',
-            model='gpt-4.1-mini',
-            latency_ms=latency,
-            success=True
-        )
-        db.add(check)
-        db.commit()
-        
-        print(f"   ✅ {latency:.0f}ms - Saved to database (ID: {check.id})")
-        
+        await run_probes_async(probes, on_result=on_result)
     except Exception as e:
-        check = ApiCheck(
-            timestamp=datetime.utcnow(),
-            provider='openai',
-            model='gpt-4.1-mini',
-            latency_ms=0,
-            success=False,
-            error_message=str(e)
-        )
-        db.add(check)
-        db.commit()
-        print(f"   ❌ Failed: {e}")
-        
+        print(f"   ⚠️ Probe batch failed: {e}")
     finally:
-        db.close()
+        for job in jobs:
+            job.running = False
+
+
+async def run_scheduler(probes=None, intervals=None):
+    """Run every probe now, then each on its own drift-free grid until cancelled"""
+    probes = probe_matrix() if probes is None else probes
+    intervals = parse_intervals(PROBE_INTERVALS) if intervals is None else intervals
+    wheel = TimerWheel(tick_s=SCHEDULER_TICK_S)
+    start = time.monotonic()
+
+    jobs = []
+    for probe in probes:
+        job = ProbeJob(probe, interval_for(probe, intervals), start)
+        # The startup run stands for the time until the first tick.
+        job.pending_runs = 1
+        job.unsampled_s = job.next_due - start
+        jobs.append(job)
+        wheel.schedule(job.next_due, job)
+        print(f"   {probe_key(probe)}: every {job.interval_s:g}s, "
+              f"next in {job.next_due - start:.0f}s")
+
+    batches = set()
+    while True:
+        await asyncio.sleep(max(0.0, wheel.next_tick_at() - time.monotonic()))
+        now = time.monotonic()
+        for when, job in wheel.advance(now):
+            if when != job.next_due:
+                # Superseded when the job entered or left burst mode.
+                continue
+            runs = job.take_due(now)
+            wheel.schedule(job.next_due, job)
+            if job.running:
+                print(f"   ⏭️ {probe_key(job.probe)} still running, skipping this tick")
+                continue
+            job.pending_runs = runs
+
+        # At most one run per job per tick, and none while its last one is
+        # still out, so catch-up runs never hit a provider all at once.
+        due_jobs = [job for job in jobs if job.pending_runs and not job.running]
+        for job in due_jobs:
+            job.start_run()
+        if due_jobs:
+            # Run in the background so a slow batch never delays the next tick.
+            batch = asyncio.create_task(run_batch(wheel, due_jobs))
+            batches.add(batch)
+            batch.add_done_callback(batches.discard)
 
-def run_checks():
-    """Run all monitoring checks"""
-    print("\n" + "="*60)
-    print(f"⏰ RUNNING CHECKS - {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC")
-    print("="*60)
-    
-    monitor_google()
-    monitor_anthropic()
-    monitor_openai()
-    
-    print("="*60)
-    print("✅ Check complete. Next check in 1 hour.")
-    print("="*60)
 
 if __name__ == "__main__":
     print("\n" + "🚀 "*20)
@@ -176,17 +239,21 @@ if __name__ == "__main__":
     print("🚀 "*20)
     print(f"\nStarted at: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC")
     
-    # Run immediately on startup
-    print("\nRunning initial check immediately...")
-    run_checks()
-    
-    # Schedule hourly checks
-    print("\nScheduling hourly checks...")
-    schedule.every(1).hours.do(run_checks)
-    
+    print("Initializing database...")
+    init_db()
+
+    # Every probe runs on the first tick, then on its grid
+    print(f"\nScheduling probes ({MISSED_TICK_POLICY} missed ticks, {PROBE_JITTER:.0%} jitter)...")
     print("Scheduler is now running. Press Ctrl+C to stop\n")
     
     # Keep running
-    while True:
-        schedule.run_pending()
-        time.sleep(60)
\ No newline at end of file
+    try:
+        asyncio.run(run_scheduler())
+    except KeyboardInterrupt:
+        print("\nScheduler stopped.")
+    finally:
+        check_sink.close()
+        stats = check_sink.stats()
+        if stats["flushes"]:
+            print(f"💾 {stats['rows_written']} checks in {stats['flushes']} flushes "
+                  f"(median {stats['flush_ms_p50']:.0f}ms, max {stats['flush_ms_max']:.0f}ms)")
@@ -0,0 +1,94 @@
+# startup_budget.py
+"""Cold-start timing report for the monitor, with a budget check.
+
+Each measurement runs in a fresh interpreter, like the hourly Actions job.
+Exits non-zero when the median startup (imports, engine creation and the
+schema check) is over STARTUP_BUDGET_MS, so it can gate CI.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "1500"))
+STARTUP_RUNS = int(os.getenv("STARTUP_RUNS", "3"))
+
+# Paid before the first probe starts; these count against the budget.
+STARTUP_STAGES = ("sqlalchemy import", "engine creation", "probe engine import",
+                  "monitor import", "schema check")
+
+
+def measure():
+    """Time each startup stage in this (fresh) process, in ms"""
+    import importlib
+
+    timings = {}
+
+    def timed(stage, action):
+        start = time.perf_counter()
+        result = action()
+        timings[stage] = (time.perf_counter() - start) * 1000
+        return result
+
+    timed("sqlalchemy import", lambda: importlib.import_module("sqlalchemy"))
+    database = timed("engine creation", lambda: importlib.import_module("database"))
+    probe_engine = timed("probe engine import", lambda: importlib.import_module("probe_engine"))
+    timed("monitor import", lambda: importlib.import_module("monitor_and_save"))
+    timed("schema check", database.init_db)
+    # Paid lazily, only by runs that probe that provider.
+    for provider in probe_engine.PROVIDER_SDKS:
+        timed(f"{provider} SDK import", lambda: probe_engine.preload_sdks([provider]))
+    return timings
+
+
+def run_child():
+    start = time.perf_counter()
+    child = subprocess.run(
+        [sys.executable, str(Path(__file__).resolve()), "--measure"],
+        capture_output=True, text=True
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if child.returncode != 0:
+        raise RuntimeError(child.stderr.strip())
+    timings = json.loads(child.stdout.strip().splitlines()[-1])
+    timings["process total"] = wall_ms
+    return timings
+
+
+def main():
+    print("\n" + "="*60)
+    print("AI API MONITOR - Startup Timing")
+    print("="*60)
+
+    runs = [run_child() for _ in range(max(1, STARTUP_RUNS))]
+    median = {stage: statistics.median(run[stage] for run in runs) for stage in runs[0]}
+    startup_ms = sum(median[stage] for stage in STARTUP_STAGES)
+
+    print(f"Median of {len(runs)} fresh processes:")
+    print()
+    for stage in STARTUP_STAGES:
+        print(f"   {stage:22s} {median[stage]:8.1f}ms")
+    print(f"   {'startup total':22s} {startup_ms:8.1f}ms  (budget {STARTUP_BUDGET_MS:.0f}ms)")
+    print()
+    print("Imported only when that provider is probed:")
+    for stage in (s for s in median if s.endswith(" SDK import")):
+        print(f"   {stage:22s} {median[stage]:8.1f}ms")
+    print()
+    print(f"   {'process total':22s} {median['process total']:8.1f}ms  (interpreter start to exit, all SDKs)")
+    print()
+
+    if startup_ms > STARTUP_BUDGET_MS:
+        print(f"❌ Startup over budget by {startup_ms - STARTUP_BUDGET_MS:.0f}ms")
+        return 1
+    print("✅ Startup within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--measure"]:
+        print(json.dumps(measure()))
+    else:
+        sys.exit(main())
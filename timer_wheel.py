@@ -0,0 +1,52 @@
+# timer_wheel.py
+import math
+import time
+
+
+class TimerWheel:
+    """Hashed timing wheel on the monotonic clock.
+
+    Items land in slot (tick % slots), so scheduling and expiry are O(1) per
+    item no matter how many timers are pending. Times are absolute
+    time.monotonic() values, so wall-clock jumps never move a timer.
+    """
+
+    def __init__(self, tick_s=1.0, slots=512, clock=time.monotonic):
+        self.tick_s = tick_s
+        self.slots = slots
+        self.clock = clock
+        self._origin = clock()
+        self._current_tick = 0
+        self._wheel = [[] for _ in range(slots)]
+
+    def _tick_of(self, when):
+        return math.ceil((when - self._origin) / self.tick_s)
+
+    def schedule(self, when, item):
+        """Fire `item` at the first tick at or after monotonic time `when`"""
+        tick = max(self._tick_of(when), self._current_tick)
+        self._wheel[tick % self.slots].append((tick, when, item))
+
+    def next_tick_at(self):
+        return self._origin + self._current_tick * self.tick_s
+
+    def advance(self, now=None):
+        """Return [(when, item)] for every timer due up to `now`"""
+        now = self.clock() if now is None else now
+        target = math.floor((now - self._origin) / self.tick_s)
+        if target < self._current_tick:
+            return []
+
+        due = []
+        # After a long stall, visiting each slot once is enough.
+        ticks = range(self._current_tick, min(target, self._current_tick + self.slots - 1) + 1)
+        for tick in ticks:
+            slot = self._wheel[tick % self.slots]
+            keep = []
+            for entry in slot:
+                (due if entry[0] <= target else keep).append(entry)
+            slot[:] = keep
+        self._current_tick = target + 1
+
+        due.sort(key=lambda entry: entry[1])
+        return [(when, item) for _, when, item in due]